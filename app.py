@@ -2,12 +2,25 @@
 import os
 import re
 import io
+import itertools
 import zipfile
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+# worker threads need the script context to use st.cache_data quietly; internal API, so optional
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except Exception:
+    add_script_run_ctx = get_script_run_ctx = None
 
 # try to import option_menu; fallback if not available
 try:
@@ -50,22 +63,25 @@ HIDDEN_COLUMN_NAMES = [
     "Assisting or Promoting Prostitution","Purchasing Prostitution","Weapon Law Violations"
 ]
 
+_NORM_DASH = re.compile(r'[\u2013\u2014–—]')
+_NORM_NONALNUM = re.compile(r'[^0-9a-z]')
+
+@lru_cache(maxsize=4096)
 def _normalize_col_name(s: str) -> str:
     if s is None:
         return ""
     s = str(s).lower()
     # normalize dashes and remove non-alphanumeric so matching is tolerant
-    s = re.sub(r'[\u2013\u2014–—]', '-', s)
-    s = re.sub(r'[^0-9a-z]', '', s)
+    s = _NORM_DASH.sub('-', s)
+    s = _NORM_NONALNUM.sub('', s)
     return s
 
-HIDDEN_SET = set(_normalize_col_name(c) for c in HIDDEN_COLUMN_NAMES)
+HIDDEN_SET = frozenset(_normalize_col_name(c) for c in HIDDEN_COLUMN_NAMES)
 
 # ----------------------------
 # Compact styling / force inline pagination row
 # ----------------------------
-st.markdown(
-    """
+_CSS = """
     <style>
     /* Buttons / selects compact */
     .stButton>button, button[role="button"] {
@@ -106,9 +122,14 @@ st.markdown(
     /* Reduce margins from markdown paragraphs to avoid extra wrapping */
     .stMarkdown p { margin:0 0 6px 0; }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+
+@st.cache_resource
+def _inject_css():
+    """Emit the stylesheet; cached so reruns replay it instead of rebuilding the element."""
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+_inject_css()
 
 st.title("🚔 NIBRS Crime Analytics Hub - Enhanced Edition")
 st.markdown("**Advanced Interactive Crime Data Analysis Platform**")
@@ -117,70 +138,95 @@ st.markdown("🎯 Navigate through different analysis categories using the sideb
 # ----------------------------
 # Utility: cleaning & loading
 # ----------------------------
-def clean_colname(s: str) -> str:
-    if pd.isna(s):
-        return s
-    s = str(s)
-    s = s.replace("\n", " ")
-    s = s.replace("â\x88\x92", "-")   # weird hyphen artifact
-    s = s.replace("â\x88\x9215", "-15")
-    s = s.replace("Nov-15", "11-15")
-    s = s.replace("?", "-")
-    s = re.sub(r"\s+", " ", s)
-    return s.strip()
+# thousands separators and "anything that can't be part of a number"
+_COMMA = re.compile(r',')
+_NUM_STRIP = re.compile(r'[^\d.\-]')
+_WS_RE = re.compile(r"\s+")
+_UNNAMED_RE = re.compile(r"^Unnamed")
+_INDEX_LIKE_RE = re.compile(r'^(unnamed: 0|index|row|#|no\.?$|s no$|sr\.?n$|sr no$|id$)', re.IGNORECASE)
+_INDEX_STRIP_RE = re.compile(r'[^\d\-\+\.]')
+
+# literal header fixes, applied in order
+_COLNAME_FIXES = [
+    ("\n", " "),
+    ("â\x88\x92", "-"),   # weird hyphen artifact
+    ("â\x88\x9215", "-15"),
+    ("Nov-15", "11-15"),
+    ("?", "-"),
+]
+
+def _clean_columns(idx: pd.Index) -> pd.Index:
+    """Clean all column names in one vectorized pass over the Index (missing names stay missing)."""
+    names = pd.Series(idx, dtype=object)
+    names = names.where(names.isna(), names.astype(str))
+    for old, new in _COLNAME_FIXES:
+        names = names.str.replace(old, new, regex=False)
+    names = names.str.replace(_WS_RE, " ", regex=True).str.strip()
+    return pd.Index(names)
 
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean column names, drop Unnamed columns, coerce numeric-like columns to numeric,
     and ensure a sensible integer index (1-based) or use an index-like column if present.
+    Works in place on the frame it is given (load_csv hands over a freshly parsed one).
     """
     if df is None or df.empty:
         return pd.DataFrame()
-    df = df.copy()
 
     # clean column names
-    df.columns = [clean_colname(c) for c in df.columns]
+    df.columns = _clean_columns(df.columns)
 
     # drop unnamed columns
-    df = df.loc[:, ~df.columns.str.match(r"^Unnamed", na=False)]
+    df = df.loc[:, ~df.columns.str.match(_UNNAMED_RE, na=False)]
 
     # attempt to coerce numeric-like columns more robustly
-    for col in df.columns:
-        # only process object / string columns
-        if df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype):
-            # remove thousands separators and surrounding whitespace
-            cleaned = df[col].astype(str).str.replace(",", "").str.strip()
+    # (only object / string columns; numeric columns need no coercion)
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        # remove thousands separators and surrounding whitespace
+        cleaned = df[col].astype(str).str.replace(_COMMA, "", regex=True).str.strip()
 
-            # for matching we strip out characters except digits, minus, dot
-            cleaned_for_match = cleaned.str.replace(r'[^\d\.\-]', '', regex=True)
+        # for matching we strip out characters except digits, minus, dot
+        cleaned_for_match = cleaned.str.replace(_NUM_STRIP, "", regex=True)
 
-            # remove empty strings (treat them as NaN for test)
-            non_null = cleaned_for_match[cleaned_for_match.notna() & (cleaned_for_match != "")]
+        # remove empty strings (treat them as NaN for test)
+        non_null = cleaned_for_match.notna() & (cleaned_for_match != "")
 
-            if len(non_null) == 0:
-                continue
+        if not non_null.any():
+            continue
 
-            # test how many values look like a number (integer or float)
-            numeric_match = non_null.str.match(r"^-?\d+(\.\d+)?$")
-            numeric_ratio = numeric_match.mean()
+        # let to_numeric decide what looks like a number (integer or float);
+        # this replaces the separate regex match pass over the column
+        coerced = pd.to_numeric(cleaned_for_match, errors="coerce")
 
-            # If a majority are numeric (>=50%) or they all match after stripping, coerce.
-            if numeric_ratio >= 0.5 or numeric_match.all():
-                df[col] = pd.to_numeric(cleaned_for_match, errors="coerce")
-            else:
-                # leave as-is (text column)
-                df[col] = df[col].astype(object)
+        # If a majority are numeric (>=50%), coerce.
+        if coerced[non_null].notna().mean() >= 0.5:
+            df[col] = coerced
+        else:
+            # leave as-is (text column)
+            df[col] = df[col].astype(object)
+
+    # store numbers in the narrowest dtype that holds them: gap-free whole-number counts
+    # become int8/16/32, everything else float32 only if every value survives the round trip
+    # (downcast="float" checks range, not precision, and would round percentages)
+    for col in df.select_dtypes(include="number").columns:
+        s = df[col]
+        if s.notna().all() and ((s % 1) == 0).all():
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif s.dtype == np.float64:
+            narrow = s.astype(np.float32)
+            if narrow.astype(np.float64).equals(s):
+                df[col] = narrow
 
     # reset index first to get a clean base
     df = df.reset_index(drop=True)
 
     # detect an index-like column (common names) and use it if it's a unique integer sequence
-    index_like_pattern = re.compile(r'^(unnamed: 0|index|row|#|no\.?$|s no$|sr\.?n$|sr no$|id$)', re.IGNORECASE)
-    index_like_col = next((c for c in df.columns if index_like_pattern.match(c.strip())), None)
+    index_like_col = next((c for c in df.columns if _INDEX_LIKE_RE.match(c.strip())), None)
+    applied_index_col = False
 
     if index_like_col:
         # try converting to numeric (strip non-digit characters)
-        conv = pd.to_numeric(df[index_like_col].astype(str).str.replace(r'[^\d\-\+\.]', '', regex=True), errors="coerce")
+        conv = pd.to_numeric(df[index_like_col].astype(str).str.replace(_INDEX_STRIP_RE, '', regex=True), errors="coerce")
         # check if conversion succeeded for all rows and values are integer-like and unique
         if conv.notna().all():
             # integer-like check (allow floats which are whole numbers)
@@ -192,34 +238,90 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
                 df.index = conv.astype(int)
                 # drop the original column so it doesn't appear twice
                 df = df.drop(columns=[index_like_col])
-            else:
-                # fallback: keep default 1-based RangeIndex below
-                pass
+                applied_index_col = True
 
     # if index not set by index-like col, set a 1-based RangeIndex for nicer display (1,2,3,...)
-    if not isinstance(df.index, pd.RangeIndex):
-        # index might have been set to integer-like above; if so, leave it.
-        if not (isinstance(df.index, pd.Int64Index) or pd.api.types.is_integer_dtype(df.index)):
-            df.index = pd.RangeIndex(start=1, stop=len(df) + 1)
-    else:
-        # replace 0-based RangeIndex with 1-based for the user's preference
-        df.index = pd.RangeIndex(start=1, stop=len(df) + 1)
-
+    if not applied_index_col:
+        df.index = pd.RangeIndex(start=1, stop=len(df) + 1, name=df.index.name)
+
+    # remember the numeric columns so chart code doesn't re-inspect dtypes on every render
+    df.attrs["numeric_cols"] = df.select_dtypes(include="number").columns.tolist()
+    # hidden columns are still needed by the charts, so record which ones may be shown rather than dropping them
+    norm = df.columns.astype(str).str.lower().str.replace(_NORM_DASH, "-", regex=True).str.replace(_NORM_NONALNUM, "", regex=True)
+    df.attrs["visible_cols"] = df.columns[~norm.isin(HIDDEN_SET)].tolist()
     return df
 
+# cleaned copies of the CSVs are kept here as Parquet so cold starts skip parsing + cleaning
+CACHE_DIR = ".cache"
+# bump whenever clean_dataframe changes what it produces, so stale sidecars are ignored
+_CLEAN_VERSION = 2
+
+def _parquet_cache_path(file_name):
+    """Sidecar Parquet path for a CSV, keyed on this app, the cleaning version and the CSV's
+    mtime + size; the other dashboard cleans differently, so the two never share a file."""
+    stat = os.stat(file_name)
+    return os.path.join(CACHE_DIR, f"{os.path.basename(file_name)}.app.v{_CLEAN_VERSION}."
+                                   f"{stat.st_mtime_ns}.{stat.st_size}.parquet")
+
+def _read_csv_arrow(file_name, encoding="utf8"):
+    """Parse a CSV with pyarrow's multithreaded reader and hand back a pandas frame."""
+    table = pa_csv.read_csv(
+        file_name,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+        # NIBRS headers wrap onto several lines inside quotes
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, null_values=["", "NA", "N/A"]),
+    )
+    # arrow falls back to raw bytes for text that isn't valid in this encoding; make the caller retry
+    if any(pa.types.is_binary(field.type) for field in table.schema):
+        raise ValueError(f"{file_name} is not valid {encoding}")
+    # name blank / repeated headers the way pd.read_csv does so clean_dataframe treats them the same
+    names, seen = [], {}
+    for i, name in enumerate(table.column_names):
+        if not name:
+            name = f"Unnamed: {i}"
+        elif name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return table.rename_columns(names).to_pandas()
+
 @st.cache_data
 def load_csv(file_name):
     if not os.path.exists(file_name):
         return pd.DataFrame()
-    try:
+    cache_path = _parquet_cache_path(file_name)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception:
+            pass
+    # pyarrow parser first (utf-8, then latin-1); the pandas C engine stays as the last resort
+    readers = [
+        lambda: _read_csv_arrow(file_name),
+        lambda: _read_csv_arrow(file_name, encoding="latin-1"),
         # Fix mixed types warning by setting low_memory=False
-        df = pd.read_csv(file_name, low_memory=False)
-    except Exception:
+        lambda: pd.read_csv(file_name, low_memory=False),
+        lambda: pd.read_csv(file_name, encoding="latin-1", low_memory=False),
+    ]
+    for read in readers:
         try:
-            df = pd.read_csv(file_name, encoding="latin-1", low_memory=False)
+            df = read()
+            break
         except Exception:
-            return pd.DataFrame()
-    return clean_dataframe(df)
+            continue
+    else:
+        return pd.DataFrame()
+    df = clean_dataframe(df)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path, engine="pyarrow", compression="zstd")
+    except Exception:
+        # best effort only (read-only folder, mixed-type column, ...)
+        pass
+    return df
 
 # ----------------------------
 # Dataset mapping (added drug-related tables)
@@ -248,24 +350,120 @@ datasets_map = {
     # time tables are not explicitly mapped here; they will be discovered automatically
 }
 
-# load datasets (cleaned)
-loaded_data = {name: load_csv(path) for name, path in datasets_map.items()}
+# load datasets (cleaned) lazily: a table is only read when a page first asks for it
+class _LazyDatasets(Mapping):
+    """Read-only mapping over datasets_map that loads each table on first access."""
+
+    def __init__(self, paths):
+        self._map = paths
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            self._loaded[name] = load_csv(self._map[name])
+        return self._loaded[name]
+
+    def __contains__(self, name):
+        # membership must not trigger a load
+        return name in self._map
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+    def prefetch(self, names):
+        """Load several datasets concurrently before a page renders them one by one.
+        CSV parsing and cleaning are mostly NumPy/Arrow work, so the threads overlap."""
+        todo = [n for n in dict.fromkeys(names) if n in self._map and n not in self._loaded]
+        if len(todo) < 2:
+            return
+        ctx = get_script_run_ctx() if get_script_run_ctx else None
+        def attach_ctx():
+            if ctx is not None:
+                add_script_run_ctx(ctx=ctx)
+        with ThreadPoolExecutor(max_workers=min(4, len(todo)), initializer=attach_ctx) as ex:
+            frames = list(ex.map(lambda n: load_csv(self._map[n]), todo))
+        self._loaded.update(zip(todo, frames))
+
+loaded_data = _LazyDatasets(datasets_map)
+# lower-cased dataset names, built once so pages can filter keys without re-lowering them
+_LOADED_KEYS_LC = {k: k.lower() for k in loaded_data}
+
+@st.cache_data(show_spinner=False)
+def _numeric_grand_total(path: str, mtime: float) -> float:
+    """Sum of every numeric cell in a dataset, as one contiguous reduction."""
+    df = load_csv(path)
+    return float(np.nansum(df[_numeric_columns(df)].to_numpy(dtype=np.float64, na_value=np.nan)))
+
+def _dataset_total(name: str) -> float:
+    """Grand total for a named dataset, cached on the file so reruns skip the reduction."""
+    path = datasets_map[name]
+    return _numeric_grand_total(path, os.path.getmtime(path))
+
+# list CSVs in folder (for on-the-fly discovery); cached on the folder's mtime, so reruns
+# skip the directory scan and adding/removing a file still refreshes the list
+@st.cache_data(ttl=60)
+def _list_csvs(mtime: float) -> tuple:
+    with os.scandir(".") as entries:
+        return tuple(e.name for e in entries if e.is_file() and e.name.lower().endswith(".csv"))
+
+csv_files = _list_csvs(os.path.getmtime("."))
+
+_AGENCY_HINTS = ("united_states", "offense_type_by_agency", "us_offense")
+
+@st.cache_data(ttl=300)
+def _find_agency_file(mtime: float):
+    """First file in the folder whose name looks like the agency-level dataset, or None."""
+    with os.scandir(".") as entries:
+        for e in entries:
+            name_l = e.name.lower()
+            if any(t in name_l for t in _AGENCY_HINTS):
+                return e.name
+    return None
+
+@st.cache_data(show_spinner=False)
+def _csv_header(file_name: str) -> list:
+    """Cleaned column names of a CSV, read from its header row only."""
+    for encoding in ("utf-8", "latin-1"):
+        try:
+            return _clean_columns(pd.read_csv(file_name, nrows=0, encoding=encoding).columns).dropna().tolist()
+        except Exception:
+            continue
+    return []
 
-# list CSVs in folder (for on-the-fly discovery)
-csv_files = [f for f in os.listdir(".") if f.lower().endswith(".csv")]
+@st.cache_data
+def _build_sample_zip(files: tuple) -> bytes:
+    """ZIP of 50-row samples of the first 5 non-empty datasets; `files` holds (name, path, mtime)
+    so the cached blob is rebuilt only when one of the CSVs changes."""
+    mem_zip = io.BytesIO()
+    # 50-row samples are tiny, so store them instead of paying for deflate
+    with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_STORED) as zf:
+        frames = ((k, load_csv(path)) for k, path, _ in files)
+        non_empty = ((k, df) for k, df in frames if df is not None and not df.empty)
+        for k, df in itertools.islice(non_empty, 5):
+            zf.writestr(f"{k.replace(' ', '_')}_sample.csv", df.head(50).to_csv(index=False).encode("utf-8"))
+    return mem_zip.getvalue()
 
 # ----------------------------
 # Enhanced Sidebar with Modern UI
 # ----------------------------
-with st.sidebar:
-    # Custom sidebar header
-    st.markdown("""
+_SIDEBAR_HEADER = """
     <div style='background: linear-gradient(90deg, #667eea 0%, #764ba2 100%); 
                 padding: 1rem; border-radius: 10px; margin-bottom: 1rem; text-align: center;'>
         <h2 style='color: white; margin: 0;'>🎯 Analytics Hub</h2>
         <p style='color: #f0f0f0; margin: 0; font-size: 14px;'>Choose your analysis focus</p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+@st.cache_resource
+def _sidebar_header():
+    st.markdown(_SIDEBAR_HEADER, unsafe_allow_html=True)
+
+with st.sidebar:
+    # Custom sidebar header
+    _sidebar_header()
 
     # Updated menu items with better names
     menu_items = [
@@ -322,7 +520,8 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
     
-    total_datasets = len([df for df in loaded_data.values() if not df.empty])
+    # count mapped files on disk instead of loading every table just for this number
+    total_datasets = sum(os.path.exists(path) for path in datasets_map.values())
     total_files = len(csv_files)
     
     col1, col2 = st.columns(2)
@@ -335,22 +534,10 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📥 Data Export")
     
-    if st.button("📦 Get Sample Data", help="Download preview of datasets"):
-        mem_zip = io.BytesIO()
-        with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-            count = 0
-            for k, df in loaded_data.items():
-                if df is None or df.empty:
-                    continue
-                buf = io.StringIO()
-                df.head(50).to_csv(buf, index=False)
-                zf.writestr(f"{k.replace(' ', '_')}_sample.csv", buf.getvalue())
-                count += 1
-                if count >= 5:
-                    break
-        mem_zip.seek(0)
-        st.download_button("📥 Download ZIP", data=mem_zip.read(), 
-                          file_name="nibrs_samples.zip", mime="application/zip")
+    sample_files = tuple((k, p, os.path.getmtime(p)) for k, p in datasets_map.items() if os.path.exists(p))
+    st.download_button("📦 Get Sample Data", data=_build_sample_zip(sample_files),
+                      file_name="nibrs_samples.zip", mime="application/zip",
+                      help="Download preview of datasets")
 
     # Footer with better styling
     st.markdown("---")
@@ -366,6 +553,13 @@ with st.sidebar:
 # ----------------------------
 # Enhanced Chart Functions - More Variety and Interactivity
 # ----------------------------
+def _numeric_columns(df: pd.DataFrame) -> list:
+    """Numeric columns recorded by clean_dataframe, falling back to select_dtypes for other frames."""
+    cached = df.attrs.get("numeric_cols")
+    if cached is not None and all(c in df.columns for c in cached):
+        return list(cached)
+    return df.select_dtypes(include="number").columns.tolist()
+
 def create_interactive_chart(df: pd.DataFrame, id_col: str, title: str, chart_type: str = "auto"):
     """Create diverse interactive charts based on data characteristics"""
     if df is None or df.empty:
@@ -375,14 +569,15 @@ def create_interactive_chart(df: pd.DataFrame, id_col: str, title: str, chart_ty
         st.warning(f"⚠️ Missing column: {id_col}. Available columns: {df.columns.tolist()}")
         return
     
-    numeric_cols = df.select_dtypes(include="number").columns.tolist()
+    numeric_cols = _numeric_columns(df)
     if not numeric_cols:
         st.warning("⚠️ No numeric columns found for plotting.")
         return
     
-    # Clean numeric data
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ""), errors='coerce').fillna(0)
+    # numeric_cols are numeric by dtype already (clean_dataframe coerced them at load), so there
+    # is nothing to re-parse; just treat gaps as 0, on a copy and only when there are any
+    if df[numeric_cols].isna().to_numpy().any():
+        df = df.fillna({col: 0 for col in numeric_cols})
     
     # Auto-select chart type based on data characteristics
     if chart_type == "auto":
@@ -446,26 +641,89 @@ def create_interactive_chart(df: pd.DataFrame, id_col: str, title: str, chart_ty
     else:  # default to enhanced bar
         create_grouped_bar_chart(df, id_col, numeric_cols, title)
 
-def create_sunburst_chart(df, id_col, numeric_cols, title):
-    """Enhanced sunburst chart"""
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols[:6], var_name="Category", value_name="Value")
-    melted = melted[melted["Value"] > 0]  # Remove zero values
+_FIGURE_BUILDERS = {}
+
+def _frame_token(df: pd.DataFrame) -> int:
+    """Cheap content fingerprint used as the figure cache key instead of hashing the whole frame.
+    Row hashes (index included) are hashed in order, so reordered or re-indexed frames differ."""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hash((tuple(df.columns), row_hashes.tobytes()))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _figure_json(builder: str, token: int, id_col: str, numeric_cols: tuple, title: str, _df: pd.DataFrame) -> dict:
+    return _FIGURE_BUILDERS[builder](_df, id_col, list(numeric_cols), title).to_plotly_json()
+
+def _cached_figure(build):
+    """Wrap a figure builder so reruns with unchanged inputs reuse the serialized figure."""
+    _FIGURE_BUILDERS[build.__name__] = build
+    def wrapper(df, id_col, numeric_cols, title):
+        return go.Figure(_figure_json(build.__name__, _frame_token(df), id_col, tuple(numeric_cols), title, df))
+    return wrapper
+
+def _np(series, dtype="float32"):
+    """Contiguous NumPy array for a trace, so Plotly can ship it as a compact typed array."""
+    return np.ascontiguousarray(series.to_numpy(dtype=dtype, na_value=np.nan))
+
+def _top_n(df, col, n):
+    """df.nlargest(n, col) via np.argpartition (O(n) selection) instead of a full sort."""
+    arr = df[col].to_numpy(dtype=float, na_value=np.nan)
+    missing = np.isnan(arr)
+    valid = np.flatnonzero(~missing)
+    if n < len(valid):
+        vals = arr[valid]
+        kth = np.partition(vals, len(vals) - n)[len(vals) - n]
+        # everything above the cut-off, then ties on the cut-off in row order (nlargest keep="first")
+        above = valid[vals > kth]
+        ties = valid[vals == kth][:n - len(above)]
+        valid = np.concatenate([above, ties])
+    order = valid[np.lexsort((valid, -arr[valid]))]
+    if len(order) < n:
+        # like nlargest, pad a short result with the NaN rows
+        order = np.concatenate([order, np.flatnonzero(missing)[:n - len(order)]])
+    return df.iloc[order]
+
+def _long_form(df, id_col, value_cols, var_name, value_name, positive_only=False):
+    """df.melt(id_vars=[id_col], value_vars=value_cols) built straight from the NumPy block.
+    With positive_only only the cells > 0 are materialized, instead of melting and then filtering."""
+    # like melt, the id column never becomes a value column (it can be numeric)
+    value_cols = [c for c in value_cols if c != id_col]
+    values = df[value_cols].to_numpy()
+    if positive_only:
+        # nonzero on the transpose keeps melt's column-by-column order
+        col_idx, row_idx = np.nonzero(values.T > 0)
+    else:
+        n_rows, n_cols = values.shape
+        col_idx = np.repeat(np.arange(n_cols), n_rows)
+        row_idx = np.tile(np.arange(n_rows), n_cols)
+    return pd.DataFrame({
+        id_col: df[id_col].to_numpy()[row_idx],
+        var_name: np.asarray(value_cols, dtype=object)[col_idx],
+        value_name: values[row_idx, col_idx],
+    })
+
+@_cached_figure
+def _sunburst_figure(df, id_col, numeric_cols, title):
+    melted = _long_form(df, id_col, numeric_cols[:6], "Category", "Value", positive_only=True)  # Remove zero values
     
     fig = px.sunburst(melted, path=[id_col, "Category"], values="Value", title=title,
                       color="Value", color_continuous_scale="viridis")
     fig.update_layout(height=600)
+    return fig
+
+def create_sunburst_chart(df, id_col, numeric_cols, title):
+    """Enhanced sunburst chart"""
+    fig = _sunburst_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.info(f"🌟 Sunburst chart showing hierarchical breakdown of {len(numeric_cols)} categories")
 
-def create_donut_chart(df, id_col, numeric_cols, title):
-    """Beautiful donut chart for categorical data"""
-    # Use the first numeric column for the donut
+@_cached_figure
+def _donut_figure(df, id_col, numeric_cols, title):
     main_col = numeric_cols[0]
-    df_clean = df[df[main_col] > 0].nlargest(8, main_col)  # Top 8 for clarity
+    df_clean = _top_n(df[df[main_col] > 0], main_col, 8)  # Top 8 for clarity
     
     fig = go.Figure(data=[go.Pie(
-        labels=df_clean[id_col], 
-        values=df_clean[main_col],
+        labels=df_clean[id_col].to_numpy(), 
+        values=_np(df_clean[main_col]),
         hole=0.4,
         textinfo='label+percent',
         textposition='outside',
@@ -479,11 +737,18 @@ def create_donut_chart(df, id_col, numeric_cols, title):
         annotations=[dict(text=f'Total<br>{df_clean[main_col].sum():,.0f}', 
                          x=0.5, y=0.5, font_size=16, showarrow=False)]
     )
+    return fig
+
+def create_donut_chart(df, id_col, numeric_cols, title):
+    """Beautiful donut chart for categorical data"""
+    # Use the first numeric column for the donut
+    main_col = numeric_cols[0]
+    fig = _donut_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.success(f"🍩 Donut chart showing distribution of {main_col} across top categories")
 
-def create_bubble_chart(df, id_col, numeric_cols, title):
-    """Interactive bubble chart for multi-dimensional analysis"""
+@_cached_figure
+def _bubble_figure(df, id_col, numeric_cols, title):
     if len(numeric_cols) >= 3:
         x_col, y_col, size_col = numeric_cols[0], numeric_cols[1], numeric_cols[2]
         color_col = numeric_cols[0] if len(numeric_cols) > 3 else numeric_cols[0]
@@ -499,109 +764,160 @@ def create_bubble_chart(df, id_col, numeric_cols, title):
                         title=title, opacity=0.7)
     
     fig.update_layout(height=600, showlegend=True)
+    return fig
+
+def create_bubble_chart(df, id_col, numeric_cols, title):
+    """Interactive bubble chart for multi-dimensional analysis"""
+    fig = _bubble_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.success(f"🫧 Bubble chart showing relationships between {len(numeric_cols)} dimensions")
 
+@_cached_figure
+def _enhanced_bar_figure(df, id_col, numeric_cols, title):
+    main_col = numeric_cols[0]
+    df_sorted = _top_n(df, main_col, 12)
+    
+    values = df_sorted[main_col].to_numpy()
+    
+    # Create colorful bar chart
+    fig = go.Figure(go.Bar(
+        x=df_sorted[id_col].to_numpy(), y=values,
+        marker=dict(color=values, colorscale="viridis", showscale=True,
+                    colorbar=dict(title=main_col)),
+        text=values, texttemplate='%{text:,.0f}', textposition='outside'
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title=id_col,
+        yaxis_title=main_col,
+        xaxis_tickangle=-45, 
+        height=600,
+        showlegend=False
+    )
+    return fig
+
 def create_enhanced_bar_chart(df, id_col, numeric_cols, title):
     """Enhanced bar chart with better visualization"""
     if len(numeric_cols) >= 1:
         main_col = numeric_cols[0]
-        df_sorted = df.nlargest(12, main_col)
-        
-        # Create colorful bar chart
-        fig = px.bar(df_sorted, x=id_col, y=main_col,
-                    title=title, color=main_col,
-                    color_continuous_scale="viridis",
-                    text=main_col)
-        
-        fig.update_layout(
-            xaxis_tickangle=-45, 
-            height=600,
-            showlegend=False
-        )
-        fig.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig = _enhanced_bar_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"📊 Interactive bar chart showing {main_col} distribution")
 
-def create_line_chart(df, id_col, numeric_cols, title):
-    """Line chart for time-based data"""
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols[:5], var_name="Crime_Type", value_name="Count")
+@_cached_figure
+def _line_figure(df, id_col, numeric_cols, title):
+    x = df[id_col].to_numpy()
     
-    fig = px.line(melted, x=id_col, y="Count", color="Crime_Type",
-                 title=title, markers=True,
-                 hover_data={"Count": ":,.0f"})
+    # one trace per crime type straight from the wide columns
+    fig = go.Figure([
+        go.Scatter(x=x, y=df[col].to_numpy(), name=col, mode="lines+markers",
+                   line=dict(width=3), marker=dict(size=8),
+                   hovertemplate="%{x}<br>Count=%{y:,.0f}")
+        for col in numeric_cols[:5] if col != id_col  # the melted id column was never a series
+    ])
     
-    fig.update_layout(height=600, xaxis_tickangle=-45)
-    fig.update_traces(line=dict(width=3), marker=dict(size=8))
+    fig.update_layout(title=title, xaxis_title=id_col, yaxis_title="Count",
+                      legend_title_text="Crime_Type", height=600, xaxis_tickangle=-45)
+    return fig
+
+def create_line_chart(df, id_col, numeric_cols, title):
+    """Line chart for time-based data"""
+    fig = _line_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.success(f"📈 Interactive line chart showing trends across {len(numeric_cols)} crime types")
 
-def create_area_chart(df, id_col, numeric_cols, title):
-    """Area chart for stacked time data"""
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols[:4], var_name="Crime_Type", value_name="Count")
+@_cached_figure
+def _area_figure(df, id_col, numeric_cols, title):
+    x = df[id_col].to_numpy()
     
-    fig = px.area(melted, x=id_col, y="Count", color="Crime_Type",
-                 title=title, hover_data={"Count": ":,.0f"})
+    fig = go.Figure([
+        go.Scatter(x=x, y=df[col].to_numpy(), name=col, mode="lines", stackgroup="crimes",
+                   hovertemplate="%{x}<br>Count=%{y:,.0f}")
+        for col in numeric_cols[:4] if col != id_col  # the melted id column was never a series
+    ])
     
-    fig.update_layout(height=600, xaxis_tickangle=-45)
+    fig.update_layout(title=title, xaxis_title=id_col, yaxis_title="Count",
+                      legend_title_text="Crime_Type", height=600, xaxis_tickangle=-45)
+    return fig
+
+def create_area_chart(df, id_col, numeric_cols, title):
+    """Area chart for stacked time data"""
+    fig = _area_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.success(f"📊 Stacked area chart showing cumulative crime patterns over time")
 
-def create_violin_chart(df, id_col, numeric_cols, title):
-    """Violin chart for distribution analysis"""
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols[:6], var_name="Category", value_name="Value")
+@_cached_figure
+def _violin_figure(df, id_col, numeric_cols, title):
+    melted = _long_form(df, id_col, numeric_cols[:6], "Category", "Value")
     
     fig = px.violin(melted, x="Category", y="Value", box=True,
                    title=title, color="Category")
     
     fig.update_layout(height=600, xaxis_tickangle=-45, showlegend=False)
+    return fig
+
+def create_violin_chart(df, id_col, numeric_cols, title):
+    """Violin chart for distribution analysis"""
+    fig = _violin_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.success(f"🎻 Violin chart showing data distribution patterns across categories")
 
+@_cached_figure
+def _radial_bar_figure(df, id_col, numeric_cols, title):
+    main_col = numeric_cols[0]
+    df_sorted = _top_n(df, main_col, 12)
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Barpolar(
+        r=_np(df_sorted[main_col]),
+        theta=df_sorted[id_col].to_numpy(),
+        width=15,
+        marker_color=_np(df_sorted[main_col]),
+        marker_colorscale="viridis",
+        opacity=0.8
+    ))
+    
+    fig.update_layout(
+        template=None,
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, df_sorted[main_col].max()])
+        ),
+        title=title,
+        height=600
+    )
+    return fig
+
 def create_radial_bar_chart(df, id_col, numeric_cols, title):
     """Radial bar chart for circular data representation"""
     if len(numeric_cols) >= 1:
         main_col = numeric_cols[0]
-        df_sorted = df.nlargest(12, main_col)
-        
-        fig = go.Figure()
-        
-        fig.add_trace(go.Barpolar(
-            r=df_sorted[main_col],
-            theta=df_sorted[id_col],
-            width=15,
-            marker_color=df_sorted[main_col],
-            marker_colorscale="viridis",
-            opacity=0.8
-        ))
-        
-        fig.update_layout(
-            template=None,
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, df_sorted[main_col].max()])
-            ),
-            title=title,
-            height=600
-        )
-        
+        fig = _radial_bar_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🎯 Radial bar chart showing circular patterns in {main_col}")
 
+@_cached_figure
+def _funnel_figure(df, id_col, numeric_cols, title):
+    main_col = numeric_cols[0]
+    df_sorted = _top_n(df, main_col, 8)
+    
+    fig = go.Figure(go.Funnel(
+        y=df_sorted[id_col].to_numpy(),
+        x=_np(df_sorted[main_col]),
+        textinfo="value+percent initial",
+        opacity=0.8,
+        marker={"color": px.colors.qualitative.Set3[:len(df_sorted)]}
+    ))
+    
+    fig.update_layout(title=title, height=600)
+    return fig
+
 def create_funnel_chart(df, id_col, numeric_cols, title):
     """Funnel chart for process flow visualization"""
     if len(numeric_cols) >= 1:
         main_col = numeric_cols[0]
-        df_sorted = df.nlargest(8, main_col).sort_values(main_col, ascending=False)
-        
-        fig = go.Figure(go.Funnel(
-            y=df_sorted[id_col],
-            x=df_sorted[main_col],
-            textinfo="value+percent initial",
-            opacity=0.8,
-            marker={"color": px.colors.qualitative.Set3[:len(df_sorted)]}
-        ))
-        
-        fig.update_layout(title=title, height=600)
+        fig = _funnel_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🔻 Funnel chart showing hierarchical flow of {main_col}")
 
@@ -664,8 +980,10 @@ def create_3d_surface_plot(df, id_col, numeric_cols, title):
     """Stunning 3D surface plot for complex data relationships"""
     if len(numeric_cols) >= 2:
         # Create a mesh grid from data
-        x_data = df[numeric_cols[0]].head(15)
-        y_data = df[numeric_cols[1]].head(15) if len(numeric_cols) > 1 else x_data
+        # plain float32 arrays: no index baggage, no int overflow in the outer product,
+        # and half the bytes of float64 in the serialized figure
+        x_data = df[numeric_cols[0]].to_numpy(dtype=np.float32)[:15]
+        y_data = df[numeric_cols[1]].to_numpy(dtype=np.float32)[:15] if len(numeric_cols) > 1 else x_data
         
         # Create 3D surface
         fig = go.Figure(data=[go.Surface(
@@ -694,6 +1012,15 @@ def create_3d_surface_plot(df, id_col, numeric_cols, title):
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🏔️ Interactive 3D surface showing crime intensity landscape!")
 
+@st.cache_data(show_spinner=False)
+def _network_layout(nodes: tuple, edges: frozenset) -> dict:
+    """Spring layout for larger graphs, computed once per node/edge set."""
+    import networkx as nx
+    G = nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    return nx.spring_layout(G, k=3, iterations=50, seed=0)
+
 def create_network_graph(df, id_col, numeric_cols, title):
     """Mind-blowing network graph showing relationships"""
     import networkx as nx
@@ -708,23 +1035,29 @@ def create_network_graph(df, id_col, numeric_cols, title):
             G.add_node(row[id_col], size=row[numeric_cols[0]] if numeric_cols else 10)
         
         # Add edges based on similarity
+        # Random connections for demonstration: one draw over the upper triangle, added in bulk
         nodes = list(G.nodes())
-        for i, node1 in enumerate(nodes):
-            for node2 in nodes[i+1:]:
-                if np.random.random() > 0.7:  # Random connections for demonstration
-                    G.add_edge(node1, node2)
+        ii, jj = np.nonzero(np.triu(np.random.random((len(nodes), len(nodes))) > 0.7, k=1))
+        G.add_edges_from((nodes[i], nodes[j]) for i, j in zip(ii, jj))
         
-        # Get positions
-        pos = nx.spring_layout(G, k=3, iterations=50)
+        # Get positions: a closed-form circle for small graphs, cached spring layout otherwise
+        if len(nodes) <= 20:
+            theta = np.linspace(0, 2 * np.pi, len(nodes), endpoint=False)
+            pos = dict(zip(nodes, np.column_stack([np.cos(theta), np.sin(theta)])))
+        else:
+            pos = _network_layout(tuple(nodes), frozenset(G.edges()))
         
-        # Create plotly network
-        edge_trace = []
-        for edge in G.edges():
-            x0, y0 = pos[edge[0]]
-            x1, y1 = pos[edge[1]]
-            edge_trace.append(go.Scatter(x=[x0, x1, None], y=[y0, y1, None],
-                                       mode='lines', line=dict(width=2, color='rgba(125, 125, 125, 0.5)'),
-                                       hoverinfo='none', showlegend=False))
+        # Create plotly network: all edges in one trace, each segment as (start, end, NaN)
+        # so the NaN breaks the polyline between edges
+        node_index = {node: i for i, node in enumerate(G.nodes())}
+        pos_arr = np.array([pos[node] for node in G.nodes()]).reshape(-1, 2)
+        ends = np.array([(node_index[u], node_index[v]) for u, v in G.edges()], dtype=int).reshape(-1, 2)
+        edge_xy = np.full((len(ends), 3, 2), np.nan)
+        edge_xy[:, 0] = pos_arr[ends[:, 0]]
+        edge_xy[:, 1] = pos_arr[ends[:, 1]]
+        edge_trace = go.Scattergl(x=edge_xy[:, :, 0].ravel(), y=edge_xy[:, :, 1].ravel(),
+                                  mode='lines', line=dict(width=2, color='rgba(125, 125, 125, 0.5)'),
+                                  hoverinfo='none', showlegend=False)
         
         # Node trace
         node_x = [pos[node][0] for node in G.nodes()]
@@ -737,7 +1070,7 @@ def create_network_graph(df, id_col, numeric_cols, title):
                                          line=dict(width=2, color='white')),
                                hoverinfo='text', showlegend=False)
         
-        fig = go.Figure(data=edge_trace + [node_trace])
+        fig = go.Figure(data=[edge_trace, node_trace])
         fig.update_layout(title=title, showlegend=False,
                          xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
                          yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
@@ -791,25 +1124,24 @@ def create_waterfall_enhanced(df, id_col, numeric_cols, title):
     """Enhanced waterfall chart with running totals"""
     if len(numeric_cols) >= 1:
         col = numeric_cols[0]
-        data = df.head(8).copy()
+        data = df.head(8)
         
         # Calculate cumulative values
-        values = data[col].tolist()
-        cumulative = np.cumsum([0] + values).tolist()
+        values = data[col].to_numpy(dtype=float)
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
         
         fig = go.Figure()
         
-        # Add waterfall bars
-        for i, (idx, row) in enumerate(data.iterrows()):
-            fig.add_trace(go.Bar(
-                x=[row[id_col]],
-                y=[values[i]],
-                base=[cumulative[i]],
-                marker_color='rgba(55, 128, 191, 0.8)' if values[i] > 0 else 'rgba(219, 64, 82, 0.8)',
-                text=f'{values[i]:,.0f}',
-                textposition='auto',
-                showlegend=False
-            ))
+        # Add waterfall bars: one trace, each bar starting where the previous one ended
+        fig.add_trace(go.Bar(
+            x=data[id_col].to_numpy(),
+            y=values.astype(np.float32),
+            base=cumulative[:-1].astype(np.float32),
+            marker_color=np.where(values > 0, 'rgba(55, 128, 191, 0.8)', 'rgba(219, 64, 82, 0.8)'),
+            text=[f'{v:,.0f}' for v in values],
+            textposition='auto',
+            showlegend=False
+        ))
         
         # Add total bar
         fig.add_trace(go.Bar(
@@ -826,101 +1158,142 @@ def create_waterfall_enhanced(df, id_col, numeric_cols, title):
             xaxis_title=id_col,
             yaxis_title=col,
             height=600,
-            bargap=0.3
+            bargap=0.3,
+            barmode='overlay'  # the total sits on its own category; don't reserve a group slot for it
         )
         
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"💧 Enhanced waterfall showing cumulative impact across categories!")
 
+@_cached_figure
+def _parallel_coordinates_figure(df, id_col, numeric_cols, title):
+    # keep the 6 most variable columns (in their original order) and a uniform row sample,
+    # which preserves the overall shape with far fewer rendered lines than plotting everything
+    dims = numeric_cols
+    if len(dims) > 6:
+        keep = set(df[dims].var().nlargest(6).index)
+        dims = [c for c in dims if c in keep]
+    plot_data = df[dims].sample(min(len(df), 500), random_state=0)
+    
+    fig = go.Figure(data=go.Parcoords(
+        line=dict(
+            color=_np(plot_data[dims[0]]),
+            colorscale='viridis',
+            showscale=True,
+            colorbar=dict(title="Crime Level")
+        ),
+        dimensions=[
+            dict(label=col.replace('_', ' ').title(), 
+                 values=_np(plot_data[col]),
+                 range=[plot_data[col].min(), plot_data[col].max()])
+            for col in dims
+        ]
+    ))
+    
+    fig.update_layout(
+        title=title,
+        height=600,
+        font=dict(size=14),
+        hovermode='closest'
+    )
+    return fig
+
 def create_parallel_coordinates(df, id_col, numeric_cols, title):
     """Stunning parallel coordinates plot"""
     if len(numeric_cols) >= 3:
-        plot_data = df[numeric_cols].head(50)
-        
-        fig = go.Figure(data=go.Parcoords(
-            line=dict(
-                color=plot_data[numeric_cols[0]],
-                colorscale='viridis',
-                showscale=True,
-                colorbar=dict(title="Crime Level")
-            ),
-            dimensions=[
-                dict(label=col.replace('_', ' ').title(), 
-                     values=plot_data[col],
-                     range=[plot_data[col].min(), plot_data[col].max()])
-                for col in numeric_cols[:6]
-            ]
-        ))
-        
-        fig.update_layout(
-            title=title,
-            height=600,
-            font=dict(size=14)
-        )
-        
+        fig = _parallel_coordinates_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🌈 Parallel coordinates revealing {len(numeric_cols[:6])}-dimensional patterns!")
 
+@_cached_figure
+def _ridgeline_figure(df, id_col, numeric_cols, title):
+    # deterministic (no random draws), so the figure can be cached
+    col = numeric_cols[0]
+    categories = df[id_col].head(10).tolist()
+    
+    fig = go.Figure()
+    
+    colors = px.colors.qualitative.Set3
+    
+    # every ridge is a normal curve (sd 15) around the category's value, evaluated on a
+    # fixed 64-point grid instead of summarizing random draws
+    offsets = np.linspace(-3, 3, 64)
+    shape = np.exp(-0.5 * offsets ** 2)
+    for i, category in enumerate(categories):
+        center = float(df[col].iloc[i]) if i < len(df) else 50.0
+    
+        # one-sided density outline, drawn as a single WebGL polygon
+        fig.add_trace(go.Scattergl(
+            x=np.concatenate([[i], i + 0.9 * shape, [i]]),
+            y=center + 15 * np.concatenate([[offsets[0]], offsets, [offsets[-1]]]),
+            name=str(category),
+            mode='lines',
+            fill='toself',
+            line_color=colors[i % len(colors)],
+            fillcolor=colors[i % len(colors)],
+            opacity=0.7,
+            showlegend=False
+        ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title=id_col, tickmode='array',
+                   tickvals=list(range(len(categories))), ticktext=[str(c) for c in categories]),
+        yaxis_title=f"{col} Distribution",
+        height=600,
+        plot_bgcolor='rgba(0,0,0,0)',
+        hovermode='closest'
+    )
+    return fig
+
 def create_ridgeline_plot(df, id_col, numeric_cols, title):
     """Beautiful ridgeline plot for distribution comparison"""
     if len(numeric_cols) >= 1:
-        col = numeric_cols[0]
-        categories = df[id_col].head(10).tolist()
-        
-        fig = go.Figure()
-        
-        colors = px.colors.qualitative.Set3
-        
-        for i, category in enumerate(categories):
-            # Create distribution data for each category
-            values = np.random.normal(df[col].iloc[i] if i < len(df) else 50, 15, 100)
-            
-            fig.add_trace(go.Violin(
-                y=values,
-                x=[category] * len(values),
-                name=category,
-                side='positive',
-                line_color=colors[i % len(colors)],
-                fillcolor=colors[i % len(colors)],
-                opacity=0.7,
-                meanline_visible=True,
-                showlegend=False
-            ))
-        
-        fig.update_layout(
-            title=title,
-            xaxis_title=id_col,
-            yaxis_title=f"{col} Distribution",
-            height=600,
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
-        
+        fig = _ridgeline_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🏔️ Ridgeline plot showing beautiful distribution landscapes!")
 
+@_cached_figure
+def _3d_scatter_figure(df, id_col, numeric_cols, title):
+    x_col, y_col, z_col = numeric_cols[0], numeric_cols[1], numeric_cols[2]
+    size_col = numeric_cols[3] if len(numeric_cols) > 3 else numeric_cols[0]
+    
+    plot_df = df.head(20).astype({c: np.float32 for c in {x_col, y_col, z_col, size_col}})
+    fig = px.scatter_3d(plot_df, x=x_col, y=y_col, z=z_col,
+                       size=size_col, color=id_col, hover_name=id_col,
+                       title=title, opacity=0.7)
+    fig.update_layout(height=700)
+    return fig
+
 def create_3d_scatter_chart(df, id_col, numeric_cols, title):
     """3D scatter plot for complex relationships"""
     if len(numeric_cols) >= 3:
-        x_col, y_col, z_col = numeric_cols[0], numeric_cols[1], numeric_cols[2]
-        size_col = numeric_cols[3] if len(numeric_cols) > 3 else numeric_cols[0]
-        
-        fig = px.scatter_3d(df.head(20), x=x_col, y=y_col, z=z_col,
-                           size=size_col, color=id_col, hover_name=id_col,
-                           title=title, opacity=0.7)
-        fig.update_layout(height=700)
+        fig = _3d_scatter_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.success(f"🎯 3D scatter plot revealing complex patterns in {len(numeric_cols)} dimensions")
     else:
         # Fallback to regular scatter
         create_bubble_chart(df, id_col, numeric_cols, title)
 
+@_cached_figure
+def _heatmap_figure(df, id_col, numeric_cols, title):
+    # metrics x rows straight from the NumPy block (no transposed DataFrame copy); laid out like
+    # px.imshow did: first metric on top, columns labelled by the frame index
+    z = np.ascontiguousarray(df[numeric_cols].to_numpy(dtype=np.float32, na_value=np.nan).T)
+    fig = go.Figure(go.Heatmap(
+        z=z, x=df.index.to_numpy(), y=list(numeric_cols), colorscale="viridis",
+        colorbar=dict(title="Value"),
+        hovertemplate=f"{id_col}: %{{x}}<br>Metrics: %{{y}}<br>Value: %{{z}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, xaxis_title=id_col, yaxis_title="Metrics",
+                      yaxis_autorange="reversed", height=500)
+    return fig
+
 def create_heatmap_chart(df, id_col, numeric_cols, title):
     """Interactive heatmap for correlation analysis"""
     # Create correlation matrix or pivot table
     if len(numeric_cols) > 1:
-        fig = px.imshow(df[numeric_cols].T, aspect="auto", color_continuous_scale="viridis",
-                       title=title, labels=dict(x=id_col, y="Metrics", color="Value"))
-        fig.update_layout(height=500)
+        fig = _heatmap_figure(df, id_col, numeric_cols, title)
         st.plotly_chart(fig, use_container_width=True)
         st.info(f"🔥 Heatmap visualization of {len(numeric_cols)} metrics across categories")
 
@@ -929,9 +1302,9 @@ def create_polar_chart(df, id_col, numeric_cols, title):
     fig = go.Figure()
     
     for col in numeric_cols[:4]:  # Limit to 4 series
-        fig.add_trace(go.Scatterpolar(
-            r=df[col],
-            theta=df[id_col],
+        fig.add_trace(go.Scatterpolargl(
+            r=_np(df[col]),
+            theta=df[id_col].to_numpy(),
             mode='lines+markers',
             name=col,
             fill='toself',
@@ -942,37 +1315,60 @@ def create_polar_chart(df, id_col, numeric_cols, title):
         polar=dict(radialaxis=dict(visible=True)),
         showlegend=True,
         title=title,
-        height=600
+        height=600,
+        hovermode='closest'
     )
     st.plotly_chart(fig, use_container_width=True)
     st.info(f"🕐 Polar chart showing circular patterns in {len(numeric_cols)} metrics")
 
+@_cached_figure
+def _treemap_figure(df, id_col, numeric_cols, title):
+    main_col = numeric_cols[0]
+    df_sorted = _top_n(df, main_col, 15)  # Top 15 for clarity
+    if df_sorted[id_col].duplicated().any():
+        # treemap labels double as ids; merge repeats like px.treemap's path grouping did
+        df_sorted = df_sorted.groupby(id_col, sort=False, as_index=False)[main_col].sum()
+    
+    # single-level treemap: every tile hangs off the root, so parents are all ""
+    values = _np(df_sorted[main_col])
+    fig = go.Figure(go.Treemap(
+        labels=df_sorted[id_col].astype(str).to_numpy(), parents=[""] * len(df_sorted), values=values,
+        marker=dict(colors=values, colorscale="Blues", showscale=True, colorbar=dict(title=main_col)),
+        hovertemplate=f"%{{label}}<br>{main_col}=%{{value}}<extra></extra>"
+    ))
+    fig.update_layout(title=title, height=600)
+    return fig
+
 def create_treemap_chart(df, id_col, numeric_cols, title):
     """Treemap for hierarchical data visualization"""
     # Use the first numeric column for sizing
     main_col = numeric_cols[0]
-    df_sorted = df.nlargest(15, main_col)  # Top 15 for clarity
-    
-    fig = px.treemap(df_sorted, path=[id_col], values=main_col, title=title,
-                     color=main_col, color_continuous_scale="Blues")
-    fig.update_layout(height=600)
+    fig = _treemap_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.info(f"🌳 Treemap showing proportional sizes by {main_col}")
 
-def create_grouped_bar_chart(df, id_col, numeric_cols, title):
-    """Enhanced grouped bar chart with animations"""
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols[:6], var_name="Category", value_name="Value")
+@_cached_figure
+def _grouped_bar_figure(df, id_col, numeric_cols, title):
+    x = df[id_col].to_numpy()
     
-    # Create animated grouped bar if we have many categories
-    if len(df) > 15:
-        fig = px.bar(melted, x=id_col, y="Value", color="Category", 
-                    title=title, barmode="group",
-                    animation_frame=id_col if len(df) > 20 else None)
-    else:
-        fig = px.bar(melted, x=id_col, y="Value", color="Category", 
-                    title=title, barmode="group")
+    # static grouped bars, one trace per column (no long-form frame); long category axes get a
+    # range slider instead of one animation frame per row
+    fig = go.Figure()
+    for col in numeric_cols[:6]:
+        if col == id_col:  # the melt this replaces never drew the id column as a bar group
+            continue
+        fig.add_bar(name=col, x=x, y=_np(df[col]),
+                    hovertemplate=f"{id_col}=%{{x}}<br>Value=%{{y}}")
     
-    fig.update_layout(xaxis_tickangle=-45, height=500)
+    fig.update_layout(title=title, barmode="group", xaxis_title=id_col, yaxis_title="Value",
+                      legend_title_text="Category", xaxis_tickangle=-45, height=500, transition_duration=0)
+    if len(df) > 20:
+        fig.update_layout(xaxis=dict(rangeslider=dict(visible=True)))
+    return fig
+
+def create_grouped_bar_chart(df, id_col, numeric_cols, title):
+    """Enhanced grouped bar chart with animations"""
+    fig = _grouped_bar_figure(df, id_col, numeric_cols, title)
     st.plotly_chart(fig, use_container_width=True)
     st.info(f"📊 Interactive grouped bar chart with {len(numeric_cols)} categories")
 
@@ -995,235 +1391,81 @@ def pretty_title_from_key(key: str) -> str:
 # ----------------------------
 # Agency-level helper: filters + compact pagination (placed AFTER the table)
 # ----------------------------
-def agency_table_with_filters(df: pd.DataFrame):
-    """
-    Enhanced agency table with fixed pagination and better error handling
-    """
-    if df is None or df.empty:
-        st.warning("No agency-level dataset found or it's empty.")
-        return
+@st.cache_data(show_spinner=False, max_entries=8)
+def _csv_bytes(token: int, sort_state, _df: pd.DataFrame) -> bytes:
+    """CSV export of a frame, reused across reruns while its contents are unchanged."""
+    return _df.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _agency_col_meta(token: int, _df: pd.DataFrame) -> dict:
+    """Column types, categorical choices and numeric ranges for the agency filter widgets."""
+    numeric_cols = _numeric_columns(_df)
+    text_cols = [c for c in _df.columns if _df[c].dtype == object or pd.api.types.is_string_dtype(_df[c])]
+    # treat low-cardinality text cols as categorical choices
+    nunique = _df[text_cols].nunique(dropna=True)
+    cat_cols = [c for c in text_cols if 0 < nunique[c] <= 20]
+    # one min/max pass over all numeric columns; all-NaN columns fall back to 0
+    bounds = _df[numeric_cols].agg(["min", "max"]).fillna(0.0) if numeric_cols else None
+    return {
+        "numeric": numeric_cols,
+        "cat": cat_cols,
+        "free_text": [c for c in text_cols if c not in cat_cols],
+        "options": {c: sorted(_df[c].dropna().unique()) for c in cat_cols},
+        "ranges": {c: (float(bounds.at["min", c]), float(bounds.at["max", c])) for c in numeric_cols},
+    }
 
-    # Initialize session state with safe defaults
-    if 'agency_page' not in st.session_state:
-        st.session_state.agency_page = 1
-    if 'agency_page_size' not in st.session_state:
-        st.session_state.agency_page_size = 20
-    if 'agency_search' not in st.session_state:
-        st.session_state.agency_search = ""
+# Streamlit >= 1.33 can rerun just part of the page; older versions render normally
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
-    df = df.reset_index(drop=True).copy()
+def _rerun_table():
+    """Rerun only the table fragment when fragments are available, else the whole script."""
+    if _fragment is not None:
+        try:
+            st.rerun(scope="fragment")
+        # st.rerun without scope (< 1.37), or called during a full-app run rather than
+        # from inside the fragment: fall back to rerunning everything
+        except (TypeError, StreamlitAPIException):
+            pass
+    st.rerun()
 
-    st.markdown("### 🔍 Advanced Filters & Search")
-    with st.expander("Filter Options", expanded=False):
-        # collect column types
-        numeric_cols = df.select_dtypes(include="number").columns.tolist()
-        text_cols = [c for c in df.columns if df[c].dtype == object or pd.api.types.is_string_dtype(df[c])]
-        # treat low-cardinality text cols as categorical choices
-        cat_cols = [c for c in text_cols if df[c].nunique(dropna=True) <= 20 and df[c].nunique(dropna=True) > 0]
-        free_text_cols = [c for c in text_cols if c not in cat_cols]
+def _set_agency_page(page: int):
+    """Store the current agency page, mirrored into the URL so the view can be shared."""
+    st.session_state.agency_page = int(page)
+    st.query_params["page"] = str(int(page))
 
-        # form keys for session_state
-        sess_prefix = "agency_filter_"
+@(_fragment or (lambda f: f))
+def _agency_table_pages(display_filtered: pd.DataFrame, csv_bytes: bytes):
+    """Current page of the agency table plus navigation and export controls."""
+    # Fixed Pagination Logic
+    page_size_options = [10, 20, 50, 100]
+    total_rows = len(display_filtered)
+    
+    # Safe pagination calculations
+    try:
+        page_size_val = st.session_state.agency_page_size
+        if page_size_val not in page_size_options:
+            page_size_val = 20
+            st.session_state.agency_page_size = 20
+    except:
+        page_size_val = 20
+        st.session_state.agency_page_size = 20
 
-        # Text search across all text columns
-        search_key = sess_prefix + "search"
-        default_search = st.session_state.get(search_key, "")
-        search_val = st.text_input("Full-text search (searches text columns)", value=default_search)
+    total_pages = max(1, (total_rows + page_size_val - 1) // page_size_val)
 
-        # Categorical multi-selects
-        cat_selected = {}
-        for col in cat_cols:
-            key = sess_prefix + f"cat__{col}"
-            default = st.session_state.get(key, [])
-            opts = sorted([v for v in df[col].dropna().unique()])
-            sel = st.multiselect(f"{col}", options=opts, default=default, key=key + "_widget")
-            cat_selected[col] = (key, sel)
-
-        # Numeric range filters
-        num_selected = {}
-        for col in numeric_cols:
-            key = sess_prefix + f"num__{col}"
-            cur_default = st.session_state.get(key, None)
-            # safely get min and max
-            try:
-                col_min = float(pd.to_numeric(df[col], errors="coerce").min() if not df[col].dropna().empty else 0.0)
-                col_max = float(pd.to_numeric(df[col], errors="coerce").max() if not df[col].dropna().empty else 0.0)
-            except Exception:
-                col_min, col_max = 0.0, 0.0
-            # decide defaults
-            if cur_default and isinstance(cur_default, (list, tuple)) and len(cur_default) == 2:
-                low_default, high_default = cur_default[0], cur_default[1]
-            else:
-                low_default, high_default = col_min, col_max
-            # show slider (use float step)
-            try:
-                rng = st.slider(f"{col} range", min_value=col_min, max_value=col_max, value=(low_default, high_default), key=key + "_widget")
-            except Exception:
-                rng = (col_min, col_max)
-            num_selected[col] = (key, rng)
-
-        # Per-column search (optional): small text inputs for free-text columns
-        col_search_vals = {}
-        for col in free_text_cols:
-            key = sess_prefix + f"text__{col}"
-            default = st.session_state.get(key, "")
-            v = st.text_input(f"Search in {col}", value=default, key=key + "_widget")
-            col_search_vals[col] = (key, v)
-
-        # Buttons: apply / reset
-        apply_clicked = st.button("Apply filters", key="agency_apply")
-        reset_clicked = st.button("Reset filters", key="agency_reset")
-
-        if apply_clicked:
-            # store values in session_state (no experimental rerun)
-            st.session_state[search_key] = search_val
-            for col, (key, sel) in cat_selected.items():
-                st.session_state[key] = sel
-            for col, (key, rng) in num_selected.items():
-                st.session_state[key] = rng
-            for col, (key, v) in col_search_vals.items():
-                st.session_state[key] = v
-            # reset page to 1 after applying filters
-            st.session_state["agency_filter__page"] = 1
-
-        if reset_clicked:
-            # remove keys created here
-            keys_to_del = [k for k in list(st.session_state.keys()) if k.startswith(sess_prefix)]
-            for k in keys_to_del:
-                del st.session_state[k]
-            # reset page size and page
-            if "agency_filter__page_size" in st.session_state:
-                del st.session_state["agency_filter__page_size"]
-            st.session_state["agency_filter__page"] = 1
-
-    # Build filtered view based on session_state values (if present)
-    filtered = df.copy()
-
-    # apply full-text search
-    search_val = st.session_state.get("agency_filter_search", "").strip()
-    if search_val:
-        mask = pd.Series(False, index=filtered.index)
-        for col in (filtered.select_dtypes(include="object").columns.tolist()):
-            mask = mask | filtered[col].astype(str).str.contains(search_val, case=False, na=False)
-        filtered = filtered[mask]
-
-    # apply categorical filters
-    for col in filtered.select_dtypes(include="object").columns.tolist():
-        key = f"agency_filter_cat__{col}"
-        if key in st.session_state:
-            sel = st.session_state[key]
-            if sel:
-                filtered = filtered[filtered[col].isin(sel)]
-
-    # apply numeric filters
-    for col in filtered.select_dtypes(include="number").columns.tolist():
-        key = f"agency_filter_num__{col}"
-        if key in st.session_state:
-            rng = st.session_state[key]
-            try:
-                low, high = float(rng[0]), float(rng[1])
-                filtered = filtered[(pd.to_numeric(filtered[col], errors="coerce") >= low) & (pd.to_numeric(filtered[col], errors="coerce") <= high)]
-            except Exception:
-                pass
-
-    # apply per-column text searches
-    for col in filtered.select_dtypes(include="object").columns.tolist():
-        key = f"agency_filter_text__{col}"
-        if key in st.session_state:
-            v = st.session_state[key].strip()
-            if v:
-                filtered = filtered[filtered[col].astype(str).str.contains(v, case=False, na=False)]
-
-    # -------------------------
-    # Filter out hidden columns for display and selection
-    visible_cols = [c for c in filtered.columns if _normalize_col_name(c) not in HIDDEN_SET]
-    # if no visible columns left, fallback to showing all (avoid empty UI)
-    if not visible_cols:
-        visible_cols = list(filtered.columns)
-
-    # Allow user to choose columns to display (optional)
-    cols_key = "agency_filter__columns"
-    default_cols = st.session_state.get(cols_key, visible_cols)
-    # show multiselect for visible columns only
-    selected_columns = st.multiselect("Columns to display", options=visible_cols, default=default_cols, key="agency_cols_widget")
-    st.session_state[cols_key] = selected_columns if selected_columns else visible_cols
-    # apply selection to filtered display
-    display_filtered = filtered.copy()
-    if selected_columns:
-        display_filtered = display_filtered[selected_columns]
-    else:
-        display_filtered = display_filtered[visible_cols]
-
-    # --- IMPORTANT: remove state names from any column that normalizes to "state"
-    for col in list(display_filtered.columns):
-        if _normalize_col_name(col) == "state":
-            # replace state values with blank strings so state names are not visible or exported
-            display_filtered[col] = ""
-
-    # NOTE: the selected-columns chip row was intentionally REMOVED per request:
-    # the multiselect box is the single place to add/remove visible columns.
-
-    # Sorting — allow optional sorting by column and direction (only on visible/display cols)
-    sort_key = "agency_filter__sort"
-    stored_sort_col = st.session_state.get(sort_key, "(none)")
-    sort_options = ["(none)"] + list(display_filtered.columns)
-    sort_index = sort_options.index(stored_sort_col) if stored_sort_col in sort_options else 0
-    sort_col = st.selectbox("Sort by (optional)", options=sort_options, index=sort_index, key="agency_sort_widget")
-    if sort_col and sort_col != "(none)":
-        sort_dir_key = "agency_filter__sort_dir"
-        default_dir = st.session_state.get(sort_dir_key, "desc")
-        dir_choice = st.radio("Sort direction", options=["asc", "desc"], index=0 if default_dir == "asc" else 1, horizontal=True, key="agency_sort_dir_widget")
-        st.session_state[sort_key] = sort_col
-        st.session_state[sort_dir_key] = dir_choice
-        try:
-            display_filtered = display_filtered.sort_values(by=sort_col, ascending=(dir_choice == "asc"), na_position="last")
-        except Exception:
-            pass
-    else:
-        if sort_key in st.session_state:
-            del st.session_state[sort_key]
-        if "agency_filter__sort_dir" in st.session_state:
-            del st.session_state["agency_filter__sort_dir"]
-
-    # Provide dataset summary and download (download only includes visible/display columns)
-    st.markdown(f"**Filtered rows:** {len(filtered):,}")
-    # Ensure exported CSV also has no state names in 'State' columns
-    export_df = display_filtered.copy()
-    for col in list(export_df.columns):
-        if _normalize_col_name(col) == "state":
-            export_df[col] = ""
-    csv_bytes = export_df.to_csv(index=False).encode("utf-8")
-    st.download_button("Download filtered CSV", data=csv_bytes, file_name="agency_filtered.csv", mime="text/csv")
-
-    # --------------------------
-    # Fixed Pagination Logic
-    page_size_options = [10, 20, 50, 100]
-    total_rows = len(display_filtered)
-    
-    # Safe pagination calculations
-    try:
-        page_size_val = st.session_state.agency_page_size
-        if page_size_val not in page_size_options:
-            page_size_val = 20
-            st.session_state.agency_page_size = 20
-    except:
-        page_size_val = 20
-        st.session_state.agency_page_size = 20
-
-    total_pages = max(1, (total_rows + page_size_val - 1) // page_size_val)
-
-    # Ensure page is within valid range
-    if st.session_state.agency_page < 1:
-        st.session_state.agency_page = 1
-    if st.session_state.agency_page > total_pages:
-        st.session_state.agency_page = total_pages
+    # Ensure page is within valid range
+    if st.session_state.agency_page < 1:
+        st.session_state.agency_page = 1
+    if st.session_state.agency_page > total_pages:
+        st.session_state.agency_page = total_pages
 
     # Compute data slice
     start_idx = (st.session_state.agency_page - 1) * page_size_val
     end_idx = min(start_idx + page_size_val, total_rows)
     
     if total_rows > 0:
-        page_df = display_filtered.iloc[start_idx:end_idx].copy()
+        # a positional slice is enough: st.dataframe doesn't mutate, and re-labelling the index
+        # doesn't touch the data blocks
+        page_df = display_filtered.iloc[start_idx:end_idx]
         page_df.index = pd.RangeIndex(start=start_idx + 1, stop=start_idx + 1 + len(page_df))
         st.dataframe(page_df, use_container_width=True)
     else:
@@ -1267,8 +1509,8 @@ def agency_table_with_filters(df: pd.DataFrame):
         if st.button("⬅️ **Previous Page**", disabled=prev_disabled, 
                     help="Go to previous page" if not prev_disabled else "Already on first page",
                     use_container_width=True):
-            st.session_state.agency_page -= 1
-            st.rerun()
+            _set_agency_page(st.session_state.agency_page - 1)
+            _rerun_table()
     
     with nav_col2:
         st.markdown("<div style='text-align: center; padding-top: 8px;'><strong>Go to:</strong></div>", 
@@ -1280,8 +1522,8 @@ def agency_table_with_filters(df: pd.DataFrame):
                                   help=f"Enter page number (1-{total_pages})",
                                   label_visibility="collapsed")
         if new_page != st.session_state.agency_page:
-            st.session_state.agency_page = new_page
-            st.rerun()
+            _set_agency_page(new_page)
+            _rerun_table()
     
     with nav_col4:
         st.markdown("<div style='text-align: center; padding-top: 8px;'><strong>Rows:</strong></div>", 
@@ -1292,8 +1534,8 @@ def agency_table_with_filters(df: pd.DataFrame):
         if st.button("**Next Page** ➡️", disabled=next_disabled,
                     help="Go to next page" if not next_disabled else "Already on last page",
                     use_container_width=True):
-            st.session_state.agency_page += 1
-            st.rerun()
+            _set_agency_page(st.session_state.agency_page + 1)
+            _rerun_table()
     
     # Page size control
     st.markdown("#### ⚙️ Display Settings")
@@ -1305,8 +1547,8 @@ def agency_table_with_filters(df: pd.DataFrame):
                                     help="Change how many rows to display per page")
         if new_page_size != st.session_state.agency_page_size:
             st.session_state.agency_page_size = new_page_size
-            st.session_state.agency_page = 1  # Reset to first page
-            st.rerun()
+            _set_agency_page(1)  # Reset to first page
+            _rerun_table()
     
     # Download section with better styling
     if total_rows > 0:
@@ -1315,10 +1557,10 @@ def agency_table_with_filters(df: pd.DataFrame):
         
         download_col1, download_col2, download_col3 = st.columns([1, 2, 1])
         with download_col2:
-            csv_data = display_filtered.to_csv(index=False).encode('utf-8')
+            # same rows/columns as the export above, so reuse its bytes
             st.download_button(
                 "📥 **Download Filtered Data as CSV**", 
-                csv_data, 
+                csv_bytes, 
                 "agency_filtered_data.csv", 
                 "text/csv",
                 help="Download the currently filtered dataset",
@@ -1328,37 +1570,270 @@ def agency_table_with_filters(df: pd.DataFrame):
 
     st.markdown("---")
 
+def _agency_filter_state(df: pd.DataFrame) -> tuple:
+    """Hashable snapshot of the applied agency filters held in session_state."""
+    ss = st.session_state
+    text_cols = df.select_dtypes(include="object").columns
+    cats = tuple((c, tuple(ss[f"agency_filter_cat__{c}"])) for c in text_cols
+                 if ss.get(f"agency_filter_cat__{c}"))
+    nums = tuple((c, tuple(ss[f"agency_filter_num__{c}"])) for c in _numeric_columns(df)
+                 if f"agency_filter_num__{c}" in ss)
+    texts = tuple((c, ss[f"agency_filter_text__{c}"].strip()) for c in text_cols
+                  if ss.get(f"agency_filter_text__{c}", "").strip())
+    return (ss.get("agency_filter_search", "").strip(), cats, nums, texts)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _search_blob(token: int, _df: pd.DataFrame) -> pd.Series:
+    """Lower-cased text columns joined per row; the separator keeps matches from spanning cells."""
+    parts = [_df[c].astype(str).str.lower() for c in _df.select_dtypes(include="object").columns]
+    if not parts:
+        return pd.Series("", index=_df.index)
+    return parts[0].str.cat(parts[1:], sep="\x1f", na_rep="")
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _apply_agency_filters(token: int, filter_state: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    search_val, cats, nums, texts = filter_state
+    filtered = _df
+
+    # apply full-text search (one literal pass over the pre-joined text columns)
+    if search_val:
+        blob = _search_blob(token, _df)
+        filtered = filtered[blob.str.contains(search_val.lower(), regex=False, na=False)]
+
+    # apply categorical filters
+    for col, sel in cats:
+        filtered = filtered[filtered[col].isin(sel)]
+
+    # apply numeric filters (columns are numeric by dtype, no coercion needed)
+    for col, rng in nums:
+        try:
+            low, high = float(rng[0]), float(rng[1])
+            filtered = filtered[filtered[col].between(low, high)]
+        except Exception:
+            pass
+
+    # apply per-column text searches
+    for col, v in texts:
+        filtered = filtered[filtered[col].astype(str).str.contains(v, case=False, na=False)]
+    return filtered
+
+def agency_table_with_filters(df: pd.DataFrame):
+    """
+    Enhanced agency table with fixed pagination and better error handling
+    """
+    if df is None or df.empty:
+        st.warning("No agency-level dataset found or it's empty.")
+        return
+
+    # Initialize session state with safe defaults
+    if 'agency_page' not in st.session_state:
+        # restore the page from the URL (?page=N) on a fresh session
+        page_param = st.query_params.get("page", "1")
+        st.session_state.agency_page = int(page_param) if str(page_param).isdigit() else 1
+    if 'agency_page_size' not in st.session_state:
+        st.session_state.agency_page_size = 20
+    if 'agency_search' not in st.session_state:
+        st.session_state.agency_search = ""
+
+    df = df.reset_index(drop=True).copy()
+    token = _frame_token(df)
+
+    st.markdown("### 🔍 Advanced Filters & Search")
+    with st.expander("Filter Options", expanded=False):
+        # column types, choices and ranges are computed once per dataset
+        meta = _agency_col_meta(token, df)
+        numeric_cols = meta["numeric"]
+        cat_cols = meta["cat"]
+        free_text_cols = meta["free_text"]
+
+        # form keys for session_state
+        sess_prefix = "agency_filter_"
+
+        # Text search across all text columns
+        search_key = sess_prefix + "search"
+        default_search = st.session_state.get(search_key, "")
+        search_val = st.text_input("Full-text search (searches text columns)", value=default_search)
+
+        # Categorical multi-selects
+        cat_selected = {}
+        for col in cat_cols:
+            key = sess_prefix + f"cat__{col}"
+            default = st.session_state.get(key, [])
+            opts = meta["options"][col]
+            sel = st.multiselect(f"{col}", options=opts, default=default, key=key + "_widget")
+            cat_selected[col] = (key, sel)
+
+        # Numeric range filters
+        num_selected = {}
+        for col in numeric_cols:
+            key = sess_prefix + f"num__{col}"
+            cur_default = st.session_state.get(key, None)
+            col_min, col_max = meta["ranges"][col]
+            # decide defaults
+            if cur_default and isinstance(cur_default, (list, tuple)) and len(cur_default) == 2:
+                low_default, high_default = cur_default[0], cur_default[1]
+            else:
+                low_default, high_default = col_min, col_max
+            # show slider (use float step)
+            try:
+                rng = st.slider(f"{col} range", min_value=col_min, max_value=col_max, value=(low_default, high_default), key=key + "_widget")
+            except Exception:
+                rng = (col_min, col_max)
+            num_selected[col] = (key, rng)
+
+        # Per-column search (optional): small text inputs for free-text columns
+        col_search_vals = {}
+        for col in free_text_cols:
+            key = sess_prefix + f"text__{col}"
+            default = st.session_state.get(key, "")
+            v = st.text_input(f"Search in {col}", value=default, key=key + "_widget")
+            col_search_vals[col] = (key, v)
+
+        # Buttons: apply / reset
+        apply_clicked = st.button("Apply filters", key="agency_apply")
+        reset_clicked = st.button("Reset filters", key="agency_reset")
+
+        if apply_clicked:
+            # store values in session_state (no experimental rerun)
+            st.session_state[search_key] = search_val
+            for col, (key, sel) in cat_selected.items():
+                st.session_state[key] = sel
+            for col, (key, rng) in num_selected.items():
+                st.session_state[key] = rng
+            for col, (key, v) in col_search_vals.items():
+                st.session_state[key] = v
+            # reset page to 1 after applying filters
+            st.session_state["agency_filter__page"] = 1
+
+        if reset_clicked:
+            # remove keys created here
+            keys_to_del = [k for k in list(st.session_state.keys()) if k.startswith(sess_prefix)]
+            for k in keys_to_del:
+                del st.session_state[k]
+            # reset page size and page
+            if "agency_filter__page_size" in st.session_state:
+                del st.session_state["agency_filter__page_size"]
+            st.session_state["agency_filter__page"] = 1
+
+    # Build filtered view based on session_state values (if present); the filtering itself
+    # is cached on the frame contents + filter values, so paging/sorting reruns skip it
+    filtered = _apply_agency_filters(token, _agency_filter_state(df), df)
+
+    # -------------------------
+    # Filter out hidden columns for display and selection
+    visible_cols = df.attrs.get("visible_cols")
+    if visible_cols is None or not all(c in filtered.columns for c in visible_cols):
+        visible_cols = [c for c in filtered.columns if _normalize_col_name(c) not in HIDDEN_SET]
+    visible_cols = list(visible_cols)
+    # if no visible columns left, fallback to showing all (avoid empty UI)
+    if not visible_cols:
+        visible_cols = list(filtered.columns)
+
+    # Allow user to choose columns to display (optional)
+    cols_key = "agency_filter__columns"
+    default_cols = st.session_state.get(cols_key, visible_cols)
+    # show multiselect for visible columns only
+    selected_columns = st.multiselect("Columns to display", options=visible_cols, default=default_cols, key="agency_cols_widget")
+    st.session_state[cols_key] = selected_columns if selected_columns else visible_cols
+    # apply selection to filtered display
+    display_filtered = filtered[selected_columns if selected_columns else visible_cols]
+
+    # --- IMPORTANT: remove state names from any column that normalizes to "state"
+    # replace state values with blank strings so state names are not visible or exported
+    state_cols = [c for c in display_filtered.columns if _normalize_col_name(c) == "state"]
+    if state_cols:
+        display_filtered = display_filtered.assign(**{c: "" for c in state_cols})
+
+    # NOTE: the selected-columns chip row was intentionally REMOVED per request:
+    # the multiselect box is the single place to add/remove visible columns.
+
+    # Sorting — allow optional sorting by column and direction (only on visible/display cols)
+    sort_key = "agency_filter__sort"
+    stored_sort_col = st.session_state.get(sort_key, "(none)")
+    sort_options = ["(none)"] + list(display_filtered.columns)
+    sort_index = sort_options.index(stored_sort_col) if stored_sort_col in sort_options else 0
+    sort_col = st.selectbox("Sort by (optional)", options=sort_options, index=sort_index, key="agency_sort_widget")
+    sort_state = None
+    if sort_col and sort_col != "(none)":
+        sort_dir_key = "agency_filter__sort_dir"
+        default_dir = st.session_state.get(sort_dir_key, "desc")
+        dir_choice = st.radio("Sort direction", options=["asc", "desc"], index=0 if default_dir == "asc" else 1, horizontal=True, key="agency_sort_dir_widget")
+        st.session_state[sort_key] = sort_col
+        st.session_state[sort_dir_key] = dir_choice
+        try:
+            display_filtered = display_filtered.sort_values(by=sort_col, ascending=(dir_choice == "asc"), na_position="last")
+            sort_state = (sort_col, dir_choice)
+        except Exception:
+            pass
+    else:
+        if sort_key in st.session_state:
+            del st.session_state[sort_key]
+        if "agency_filter__sort_dir" in st.session_state:
+            del st.session_state["agency_filter__sort_dir"]
+
+    # Provide dataset summary and download (download only includes visible/display columns)
+    st.markdown(f"**Filtered rows:** {len(filtered):,}")
+    # exported CSV has no state names either: display_filtered was blanked above
+    export_df = display_filtered
+    # row order is part of the export, so the sort goes into the cache key alongside the contents
+    csv_bytes = _csv_bytes(_frame_token(export_df), sort_state, export_df)
+    st.download_button("Download filtered CSV", data=csv_bytes, file_name="agency_filtered.csv", mime="text/csv")
+
+    # --------------------------
+    # Pagination runs as a fragment: page clicks rerun only the table, not the whole app
+    _agency_table_pages(display_filtered, csv_bytes)
+
 # ----------------------------
 # Chart Rendering Functions
 # ----------------------------
+_NON_ALPHA_RE = re.compile(r'[^a-z]')
+
+# column names that look like time-of-day buckets: 'time of', 'time', 'hour', 'a.m.', 'p.m.',
+# 'am', 'pm', 'unknown time' -- one alternation instead of a chain of substring tests
+_TIME_COL_RE = re.compile(r'time of|^time$|time |hour|a\.m\.|p\.m\.|\bam\b|\bpm\b|unknown time')
+
+_STATE_NAME_TO_CODE = {
+    'alabama':'AL','alaska':'AK','arizona':'AZ','arkansas':'AR','california':'CA','colorado':'CO','connecticut':'CT','delaware':'DE','florida':'FL','georgia':'GA','hawaii':'HI','idaho':'ID','illinois':'IL','indiana':'IN','iowa':'IA','kansas':'KS','kentucky':'KY','louisiana':'LA','maine':'ME','maryland':'MD','massachusetts':'MA','michigan':'MI','minnesota':'MN','mississippi':'MS','missouri':'MO','montana':'MT','nebraska':'NE','nevada':'NV','new hampshire':'NH','new jersey':'NJ','new mexico':'NM','new york':'NY','north carolina':'NC','north dakota':'ND','ohio':'OH','oklahoma':'OK','oregon':'OR','pennsylvania':'PA','rhode island':'RI','south carolina':'SC','south dakota':'SD','tennessee':'TN','texas':'TX','utah':'UT','vermont':'VT','virginia':'VA','washington':'WA','west virginia':'WV','wisconsin':'WI','wyoming':'WY','district of columbia':'DC'
+}
+# as a Series so .map() runs as a vectorized hash lookup
+_STATE_MAP_SERIES = pd.Series(_STATE_NAME_TO_CODE)
+
+_AGENCY_COL_CANDIDATES = ("number of participating agencies", "population covered", "population",
+                          "number of agencies", "participating agencies", "agencies")
+
+@lru_cache(maxsize=64)
+def _col_index(cols: tuple) -> dict:
+    """Stripped lower-case column name -> first column with that name."""
+    index = {}
+    for c in cols:
+        index.setdefault(str(c).strip().lower(), c)
+    return index
+
+def _first_matching_col(df, *needles, default_first=True):
+    """First column whose lower-cased name contains every needle (or the first column)."""
+    if len(df.columns) == 0:
+        return None
+    cols_l = df.columns.str.lower()
+    mask = np.ones(len(cols_l), dtype=bool)
+    for needle in needles:
+        mask &= cols_l.str.contains(needle, regex=False, na=False)
+    if mask.any():
+        return df.columns[mask][0]
+    return df.columns[0] if default_first else None
+
 def plot_state_heatmap():
     df = loaded_data.get("Participation by State", pd.DataFrame())
     if df is None or df.empty:
         st.warning("⚠️ Participation by State dataset not loaded or empty.")
         return
 
-    state_col = None
-    for c in df.columns:
-        if c.strip().lower() == "state":
-            state_col = c
-            break
-    if state_col is None:
-        for c in df.columns:
-            if "state" in c.lower():
-                state_col = c
-                break
-
-    agencies_col = None
-    for candidate in ["Number of Participating Agencies", "Population Covered", "Population", "Number of Agencies", "Participating Agencies", "Agencies"]:
-        for c in df.columns:
-            if candidate.lower() == c.lower():
-                agencies_col = c
-                break
-        if agencies_col:
-            break
+    col_index = _col_index(tuple(df.columns))
+    state_col = col_index.get("state") or next((c for k, c in col_index.items() if "state" in k), None)
+
+    agencies_col = next((col_index[k] for k in _AGENCY_COL_CANDIDATES if k in col_index), None)
 
     if agencies_col is None:
-        numeric_cols = df.select_dtypes(include="number").columns.tolist()
+        numeric_cols = _numeric_columns(df)
         if numeric_cols:
             agencies_col = numeric_cols[0]
 
@@ -1371,43 +1846,40 @@ def plot_state_heatmap():
         st.write(df.columns.tolist())
         return
 
-    try:
-        df[agencies_col] = pd.to_numeric(df[agencies_col].astype(str).str.replace(",", "").str.strip(), errors="coerce")
-    except Exception:
-        pass
-
-    def maybe_state_code(s):
-        s = str(s).strip()
-        if len(s) == 2 and s.isalpha():
-            return s.upper()
-        return s
-
-    df["_state_for_map"] = df[state_col].apply(maybe_state_code)
+    # clean_dataframe already made numeric-looking columns numeric; only re-parse text
+    if not pd.api.types.is_numeric_dtype(df[agencies_col]):
+        try:
+            df[agencies_col] = pd.to_numeric(df[agencies_col].astype(str).str.replace(",", "").str.strip(), errors="coerce")
+        except Exception:
+            pass
 
-    state_map_simple = {
-        'alabama':'AL','alaska':'AK','arizona':'AZ','arkansas':'AR','california':'CA','colorado':'CO','connecticut':'CT','delaware':'DE','florida':'FL','georgia':'GA','hawaii':'HI','idaho':'ID','illinois':'IL','indiana':'IN','iowa':'IA','kansas':'KS','kentucky':'KY','louisiana':'LA','maine':'ME','maryland':'MD','massachusetts':'MA','michigan':'MI','minnesota':'MN','mississippi':'MS','missouri':'MO','montana':'MT','nebraska':'NE','nevada':'NV','new hampshire':'NH','new jersey':'NJ','new mexico':'NM','new york':'NY','north carolina':'NC','north dakota':'ND','ohio':'OH','oklahoma':'OK','oregon':'OR','pennsylvania':'PA','rhode island':'RI','south carolina':'SC','south dakota':'SD','tennessee':'TN','texas':'TX','utah':'UT','vermont':'VT','virginia':'VA','washington':'WA','west virginia':'WV','wisconsin':'WI','wyoming':'WY','district of columbia':'DC'
-    }
-    def to_code(val):
-        if pd.isna(val):
-            return None
-        s = str(val).strip()
-        if len(s) == 2 and s.isalpha():
-            return s.upper()
-        key = re.sub(r'[^a-z]', '', s.lower())
-        return state_map_simple.get(key, None)
-
-    df["_state_code"] = df[state_col].apply(to_code)
-    df_map = df[df["_state_code"].notna()].copy()
+    # vectorized state handling: values that already are 2-letter codes (the common case) are
+    # upper-cased, and only the remaining rows pay for the regex + name -> code lookup
+    names = df[state_col].astype(str).str.strip()
+    is_code = (names.str.len() == 2) & names.str.isalpha()
+    codes = names.str.upper().where(is_code)
+    df["_state_for_map"] = codes.fillna(names)
+
+    rest = names.loc[~is_code].str.lower().str.replace(_NON_ALPHA_RE, '', regex=True)
+    codes = codes.fillna(rest.map(_STATE_MAP_SERIES))
+    df["_state_code"] = codes.where(df[state_col].notna())
+    # plotly and the preview only read these three columns, so slice them instead of copying the frame
+    df_map = df.loc[df["_state_code"].notna(), [state_col, agencies_col, "_state_code"]]
     if df_map.empty:
         st.warning("⚠️ No rows with valid US state codes after mapping. Showing table preview instead.")
         st.dataframe(df.head(20))
         return
 
-    fig = px.choropleth(df_map, locations="_state_code", locationmode="USA-states",
-                        color=agencies_col, hover_name=state_col,
-                        hover_data=[agencies_col], scope="usa",
-                        color_continuous_scale="viridis",
-                        title="Participation by State")
+    # build the trace from raw arrays; px.choropleth would re-resolve every column through its dataframe adapter
+    fig = go.Figure(go.Choropleth(
+        locations=df_map["_state_code"].to_numpy(),
+        z=df_map[agencies_col].to_numpy(dtype=np.float64, na_value=np.nan),
+        text=df_map[state_col].to_numpy(),
+        locationmode="USA-states", colorscale="Viridis",
+        colorbar_title=str(agencies_col),
+        hovertemplate=f"<b>%{{text}}</b><br>{agencies_col}=%{{z}}<extra></extra>",
+    ))
+    fig.update_layout(geo_scope="usa", title="Participation by State")
     st.plotly_chart(fig, use_container_width=True)
 
     # Add one-line description for the map
@@ -1415,77 +1887,125 @@ def plot_state_heatmap():
 
     st.write("Preview:")
     # --- Display preview using Streamlit's dataframe style but with a 1-based index ---
-    preview_df = df_map[[state_col, agencies_col, "_state_code"]].sort_values(by=agencies_col, ascending=False).reset_index(drop=True)
-    # set 1-based index so Streamlit shows 1..N in the left gutter (no extra column)
-    preview_df.index = pd.RangeIndex(start=1, stop=len(preview_df) + 1)
-    st.dataframe(preview_df.head(20), use_container_width=True)
+    # partial top-20 selection instead of sorting every row
+    preview_df = df_map.nlargest(20, agencies_col).reset_index(drop=True)
+    # shift to a 1-based index so Streamlit shows 1..N in the left gutter (no extra column)
+    preview_df.index += 1
+    st.dataframe(preview_df, use_container_width=True)
+
+# (dataset, title, chart type, id-column needles) for each demographic page; with no
+# needles the id column is the dataset's first column
+_CHART_SPECS = {
+    "victim": [
+        ("Victims Age", "🧓 Victims by Age Category", "violin_chart", ("offense", "category")),
+        ("Victims Sex", "👫 Victims by Sex", "radial_bar", ("offense", "category")),
+        ("Victims Race", "🌍 Victims by Race", "sunburst", ("offense", "category")),
+    ],
+    "offender": [
+        ("Offenders Age", "👤 Offenders by Age Category", "funnel", ()),
+        ("Offenders Sex", "⚖️ Offenders by Sex", "donut", ()),
+        ("Offenders Race", "🌐 Offenders by Race", "bubble", ()),
+    ],
+    "arrestee": [
+        ("Arrestees Age", "🚓 Arrestees by Age Category", "scatter3d", ()),
+        ("Arrestees Sex", "👮 Arrestees by Sex", "bar_chart", ()),
+        ("Arrestees Race", "🔍 Arrestees by Race", "funnel", ()),
+    ],
+    "other": [
+        ("Victim-Offender Relationship", "🔗 Victim-Offender Relationships", "sunburst", ()),
+        ("Property Crimes by Location", "🏠 Property Crimes by Location", "area_chart", ()),
+    ],
+}
 
-def plot_victim_analysis():
-    if "Victims Age" in loaded_data:
-        df = loaded_data["Victims Age"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
-        if id_col:
-            create_interactive_chart(df, id_col, "🧓 Victims by Age Category", "violin_chart")
-    if "Victims Sex" in loaded_data:
-        df = loaded_data["Victims Sex"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
+def _plot_chart_specs(group: str):
+    """Render every chart listed for a page group, loading its datasets in parallel first."""
+    specs = _CHART_SPECS[group]
+    loaded_data.prefetch(name for name, *_ in specs)
+    for name, title, chart_type, needles in specs:
+        if name not in loaded_data:
+            continue
+        df = loaded_data[name]
+        id_col = _first_matching_col(df, *needles)
         if id_col:
-            create_interactive_chart(df, id_col, "👫 Victims by Sex", "radial_bar")
-    if "Victims Race" in loaded_data:
-        df = loaded_data["Victims Race"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
-        if id_col:
-            create_interactive_chart(df, id_col, "🌍 Victims by Race", "sunburst")
+            create_interactive_chart(df, id_col, title, chart_type)
+
+def plot_victim_analysis():
+    _plot_chart_specs("victim")
 
 def plot_offender_analysis():
-    if "Offenders Age" in loaded_data:
-        df = loaded_data["Offenders Age"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "👤 Offenders by Age Category", "funnel")
-    if "Offenders Sex" in loaded_data:
-        df = loaded_data["Offenders Sex"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            # Fix: Use enhanced bar chart for better sex visualization
-            create_interactive_chart(df, id_col, "⚖️ Offenders by Sex", "donut")
-    if "Offenders Race" in loaded_data:
-        df = loaded_data["Offenders Race"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "🌐 Offenders by Race", "bubble")
+    _plot_chart_specs("offender")
 
 def plot_arrestee_analysis():
-    if "Arrestees Age" in loaded_data:
-        df = loaded_data["Arrestees Age"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "🚓 Arrestees by Age Category", "scatter3d")
-    if "Arrestees Sex" in loaded_data:
-        df = loaded_data["Arrestees Sex"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "👮 Arrestees by Sex", "bar_chart")
-    if "Arrestees Race" in loaded_data:
-        df = loaded_data["Arrestees Race"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "🔍 Arrestees by Race", "funnel")
+    _plot_chart_specs("arrestee")
 
 def plot_other_analysis():
-    if "Victim-Offender Relationship" in loaded_data:
-        df = loaded_data["Victim-Offender Relationship"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "🔗 Victim-Offender Relationships", "sunburst")
-    if "Property Crimes by Location" in loaded_data:
-        df = loaded_data["Property Crimes by Location"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            create_interactive_chart(df, id_col, "🏠 Property Crimes by Location", "area_chart")
+    _plot_chart_specs("other")
+
+_CARD_TMPL = """
+<div style='background: linear-gradient(135deg, {c1}, {c2}); padding: 1.5rem; 
+            border-radius: 10px; text-align: center; color: white; margin-bottom: 1rem;'>
+    <h2 style='margin: 0; font-size: 2.5rem;'>{value}</h2>
+    <p style='margin: 0; font-size: 1rem;'>{label}</p>
+</div>
+"""
+
+# gradient colours and label of each overview card, in column order
+_OVERVIEW_CARD_STYLES = (
+    {"c1": "#667eea", "c2": "#764ba2", "label": "Active Datasets"},
+    {"c1": "#ff6b6b", "c2": "#ee5a24", "label": "Total Incidents"},
+    {"c1": "#feca57", "c2": "#ff9ff3", "label": "States Covered"},
+    {"c1": "#48cae4", "c2": "#023e8a", "label": "Data Files"},
+)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _overview_cards(total_datasets, total_incidents, total_states, csv_count) -> tuple:
+    """HTML for the four overview metric cards; a card is None when its dataset is missing."""
+    values = (total_datasets,
+              None if total_incidents is None else f"{total_incidents:,.0f}",
+              total_states,
+              csv_count)
+    return tuple(None if value is None else _CARD_TMPL.format_map({**style, "value": value})
+                 for style, value in zip(_OVERVIEW_CARD_STYLES, values))
+
+_CAPABILITIES_ANALYTICS_HTML = """
+<div style='background: rgba(102, 126, 234, 0.1); padding: 1.5rem; border-radius: 10px; margin: 1rem 0;'>
+    <h4>🔍 Advanced Analytics</h4>
+    <ul>
+        <li>🫧 <strong>Bubble Charts</strong> - Multi-dimensional relationships</li>
+        <li>🍩 <strong>Donut Charts</strong> - Category distributions</li>
+        <li>🌊 <strong>Waterfall Charts</strong> - Cumulative analysis</li>
+        <li>🎯 <strong>3D Scatter</strong> - Complex pattern discovery</li>
+        <li>🕐 <strong>Polar Charts</strong> - Time-based patterns</li>
+    </ul>
+</div>
+"""
+
+_CAPABILITIES_FEATURES_HTML = """
+<div style='background: rgba(255, 107, 107, 0.1); padding: 1.5rem; border-radius: 10px; margin: 1rem 0;'>
+    <h4>🎛️ Interactive Features</h4>
+    <ul>
+        <li>🔍 <strong>Hover Details</strong> - Rich information tooltips</li>
+        <li>🔎 <strong>Zoom & Pan</strong> - Detailed exploration</li>
+        <li>🎨 <strong>Color Coding</strong> - Visual pattern recognition</li>
+        <li>📊 <strong>Smart Charts</strong> - Auto-selected based on data</li>
+        <li>⚡ <strong>Real-time</strong> - Instant updates and filtering</li>
+    </ul>
+</div>
+"""
+
+_NAV_GUIDE_HTML = """
+<div style='background: linear-gradient(90deg, #667eea, #764ba2); padding: 1.5rem; 
+            border-radius: 10px; color: white; margin: 1rem 0;'>
+    <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem;'>
+        <div><strong>🗺️ Geographic</strong><br/>State-level crime mapping</div>
+        <div><strong>👥 Demographics</strong><br/>Victim & offender analysis</div>
+        <div><strong>🕐 Temporal</strong><br/>Time-based crime patterns</div>
+        <div><strong>📍 Location</strong><br/>Crime by location intelligence</div>
+        <div><strong>💊 Substances</strong><br/>Drug & alcohol analytics</div>
+        <div><strong>🏢 Agencies</strong><br/>Deep dive into agency data</div>
+    </div>
+</div>
+"""
 
 # ----------------------------
 # Page Logic
@@ -1496,99 +2016,32 @@ if selected_group == "📊 Dashboard Overview":
     st.header("📊 Crime Data Dashboard Overview")
     
     # Create attractive metric cards
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_datasets = len([df for df in loaded_data.values() if not df.empty])
-        st.markdown(f"""
-        <div style='background: linear-gradient(135deg, #667eea, #764ba2); padding: 1.5rem; 
-                    border-radius: 10px; text-align: center; color: white; margin-bottom: 1rem;'>
-            <h2 style='margin: 0; font-size: 2.5rem;'>{total_datasets}</h2>
-            <p style='margin: 0; font-size: 1rem;'>Active Datasets</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        if "Incidents & Offenses" in loaded_data and not loaded_data["Incidents & Offenses"].empty:
-            incidents_df = loaded_data["Incidents & Offenses"]
-            total_incidents = incidents_df.select_dtypes(include=[np.number]).sum().sum()
-            st.markdown(f"""
-            <div style='background: linear-gradient(135deg, #ff6b6b, #ee5a24); padding: 1.5rem; 
-                        border-radius: 10px; text-align: center; color: white; margin-bottom: 1rem;'>
-                <h2 style='margin: 0; font-size: 2.5rem;'>{total_incidents:,.0f}</h2>
-                <p style='margin: 0; font-size: 1rem;'>Total Incidents</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col3:
-        if "Participation by State" in loaded_data and not loaded_data["Participation by State"].empty:
-            states_df = loaded_data["Participation by State"]
-            total_states = len(states_df)
-            st.markdown(f"""
-            <div style='background: linear-gradient(135deg, #feca57, #ff9ff3); padding: 1.5rem; 
-                        border-radius: 10px; text-align: center; color: white; margin-bottom: 1rem;'>
-                <h2 style='margin: 0; font-size: 2.5rem;'>{total_states}</h2>
-                <p style='margin: 0; font-size: 1rem;'>States Covered</p>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    with col4:
-        csv_count = len(csv_files)
-        st.markdown(f"""
-        <div style='background: linear-gradient(135deg, #48cae4, #023e8a); padding: 1.5rem; 
-                    border-radius: 10px; text-align: center; color: white; margin-bottom: 1rem;'>
-            <h2 style='margin: 0; font-size: 2.5rem;'>{csv_count}</h2>
-            <p style='margin: 0; font-size: 1rem;'>Data Files</p>
-        </div>
-        """, unsafe_allow_html=True)
+    total_datasets = sum(os.path.exists(path) for path in datasets_map.values())
+    total_incidents = None
+    if "Incidents & Offenses" in loaded_data and not loaded_data["Incidents & Offenses"].empty:
+        total_incidents = _dataset_total("Incidents & Offenses")
+    total_states = None
+    if "Participation by State" in loaded_data and not loaded_data["Participation by State"].empty:
+        total_states = len(loaded_data["Participation by State"])
+    cards = _overview_cards(total_datasets, total_incidents, total_states, len(csv_files))
+
+    for col, card in zip(st.columns(4), cards):
+        if card:
+            col.markdown(card, unsafe_allow_html=True)
     
     # Enhanced insights section
     st.markdown("### 🎯 Platform Capabilities")
     
     col1, col2 = st.columns(2)
     with col1:
-        st.markdown("""
-        <div style='background: rgba(102, 126, 234, 0.1); padding: 1.5rem; border-radius: 10px; margin: 1rem 0;'>
-            <h4>🔍 Advanced Analytics</h4>
-            <ul>
-                <li>🫧 <strong>Bubble Charts</strong> - Multi-dimensional relationships</li>
-                <li>🍩 <strong>Donut Charts</strong> - Category distributions</li>
-                <li>🌊 <strong>Waterfall Charts</strong> - Cumulative analysis</li>
-                <li>🎯 <strong>3D Scatter</strong> - Complex pattern discovery</li>
-                <li>🕐 <strong>Polar Charts</strong> - Time-based patterns</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_CAPABILITIES_ANALYTICS_HTML, unsafe_allow_html=True)
     
     with col2:
-        st.markdown("""
-        <div style='background: rgba(255, 107, 107, 0.1); padding: 1.5rem; border-radius: 10px; margin: 1rem 0;'>
-            <h4>🎛️ Interactive Features</h4>
-            <ul>
-                <li>🔍 <strong>Hover Details</strong> - Rich information tooltips</li>
-                <li>🔎 <strong>Zoom & Pan</strong> - Detailed exploration</li>
-                <li>🎨 <strong>Color Coding</strong> - Visual pattern recognition</li>
-                <li>📊 <strong>Smart Charts</strong> - Auto-selected based on data</li>
-                <li>⚡ <strong>Real-time</strong> - Instant updates and filtering</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_CAPABILITIES_FEATURES_HTML, unsafe_allow_html=True)
     
     # Quick navigation guide
     st.markdown("### 🗺️ Quick Navigation Guide")
-    st.markdown("""
-    <div style='background: linear-gradient(90deg, #667eea, #764ba2); padding: 1.5rem; 
-                border-radius: 10px; color: white; margin: 1rem 0;'>
-        <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem;'>
-            <div><strong>🗺️ Geographic</strong><br/>State-level crime mapping</div>
-            <div><strong>👥 Demographics</strong><br/>Victim & offender analysis</div>
-            <div><strong>🕐 Temporal</strong><br/>Time-based crime patterns</div>
-            <div><strong>📍 Location</strong><br/>Crime by location intelligence</div>
-            <div><strong>💊 Substances</strong><br/>Drug & alcohol analytics</div>
-            <div><strong>🏢 Agencies</strong><br/>Deep dive into agency data</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_NAV_GUIDE_HTML, unsafe_allow_html=True)
 
 elif selected_group == "🗺️ Geographic Analysis" or selected_group == "Geospatial / State-Level":
     st.subheader("🌎 Geospatial Crime Analysis")
@@ -1600,15 +2053,14 @@ elif selected_group == "🏛️ Agency Participation":
     if df is not None and not df.empty:
         # Enhanced display with better formatting
         st.markdown("### 📊 State Participation Overview")
-        display_df = df.reset_index(drop=True).copy()
-        display_df.index = pd.RangeIndex(start=1, stop=len(display_df) + 1)
-        st.dataframe(display_df.head(20), use_container_width=True)
+        # only the first 20 rows are shown, so trim before re-indexing from 1
+        display_df = df.head(20).reset_index(drop=True)
+        display_df.index += 1
+        st.dataframe(display_df, use_container_width=True)
         
         # Add quick insights
-        if len(df.columns) > 1:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-            if numeric_cols:
-                create_interactive_chart(df, df.columns[0], "🏛️ Agency Participation Analysis", "violin_chart")
+        if len(df.columns) > 1 and _numeric_columns(df):
+            create_interactive_chart(df, df.columns[0], "🏛️ Agency Participation Analysis", "violin_chart")
     else:
         st.warning("⚠️ Participation dataset not loaded.")
 
@@ -1623,7 +2075,7 @@ elif selected_group == "📈 Crime Incidents":
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_incidents = df.select_dtypes(include=[np.number]).sum().sum()
+            total_incidents = _dataset_total("Incidents & Offenses")
             st.metric("Total Incidents", f"{total_incidents:,.0f}")
         
         with col2:
@@ -1636,7 +2088,7 @@ elif selected_group == "📈 Crime Incidents":
                 st.metric("Avg per Category", f"{avg_per_category:,.0f}")
         
         # Create main visualization
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()), df.columns[0] if len(df.columns)>0 else None)
+        id_col = _first_matching_col(df, "offense", "category")
         if id_col:
             create_interactive_chart(df, id_col, "📊 Crime Incidents Distribution", "treemap")
             
@@ -1665,10 +2117,13 @@ elif selected_group == "📍 Location Intelligence":
     location_datasets = []
     
     # Look for location-related datasets
-    for key, df in loaded_data.items():
-        if any(term in key.lower() for term in ["location", "property", "crimes against property"]):
-            if not df.empty:
-                location_datasets.append((key, df))
+    location_keys = [key for key, kl in _LOADED_KEYS_LC.items()
+                     if "location" in kl or "property" in kl]
+    loaded_data.prefetch(location_keys)
+    for key in location_keys:
+        df = loaded_data[key]
+        if not df.empty:
+            location_datasets.append((key, df))
     
     if location_datasets:
         st.markdown("### 🏢 Crime Distribution by Location Type")
@@ -1676,7 +2131,7 @@ elif selected_group == "📍 Location Intelligence":
         
         for key, df in location_datasets:
             st.markdown(f"#### 📍 {key}")
-            id_col = df.columns[0] if len(df.columns) > 0 else None
+            id_col = _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, f"📍 {key} Analysis", "bubble")
     else:
@@ -1703,51 +2158,48 @@ elif selected_group == "🕐 Temporal Patterns":
     def has_time_like_column(df):
         if df is None or df.empty:
             return False
-        for c in df.columns:
-            low = c.lower()
-            # look for 'time of', 'time', 'hour', 'a.m.', 'p.m.', 'am', 'pm', 'unknown time'
-            if ("time of" in low) or ("time" == low) or ("time " in low) or ("hour" in low) or ("a.m." in low) or ("p.m." in low) or re.search(r'\bam\b|\bpm\b', low) or ("unknown time" in low) or ("time of day" in low):
-                return True
-        return False
-
-    # search loaded (mapped) datasets first
+        return any(_TIME_COL_RE.search(c.lower()) for c in df.columns)
+
+    # search loaded (mapped) datasets first; every one gets inspected, so load them in parallel
+    loaded_data.prefetch(loaded_data)
     for key, df in loaded_data.items():
         if has_time_like_column(df):
             time_related.append((key, df))
 
+    # file names already shown (by key or through their mapped path), so those CSVs are never re-parsed
+    seen_files = {os.path.basename(str(k)).lower() for k, _ in time_related}
+    seen_files.update(os.path.basename(datasets_map[k]).lower() for k, _ in time_related)
+
     # also scan csv filenames for time-related tables (load on the fly)
     for fname in csv_files:
         low = fname.lower()
-        if "time" in low or "time_of_day" in low or "by_time" in low or "timeofday" in low:
-            df_try = load_csv(fname)
-            if has_time_like_column(df_try):
-                # don't duplicate if same logical dataset already in list
-                already = any(os.path.basename(str(k)).lower() == fname.lower() or k == fname for k, _ in time_related)
-                if not already:
-                    time_related.append((fname, df_try))
+        # "time_of_day", "by_time" and "timeofday" all contain "time"
+        if "time" not in low or low in seen_files:
+            continue
+        # peek at the header first; only parse the whole file when a time column is there
+        if not any(_TIME_COL_RE.search(c.lower()) for c in _csv_header(fname)):
+            continue
+        df_try = load_csv(fname)
+        if has_time_like_column(df_try):
+            time_related.append((fname, df_try))
+            seen_files.add(low)
 
     # show a helpful message only if none found
     if not time_related:
         st.info("Time-based plots will appear if your CSVs include time-of-day / time columns (e.g. 'Time of Day'). No time-based datasets were found automatically.")
     else:
         # display each discovered dataset using unique chart types
-        chart_types = ["area_chart", "radial_bar", "line_chart"]  # Different charts for each temporal dataset
+        chart_types = itertools.cycle(["area_chart", "radial_bar", "line_chart"])  # Different charts for each temporal dataset
         
-        for i, (key, df) in enumerate(time_related):
+        for (key, df), chart_type in zip(time_related, chart_types):
             pretty = pretty_title_from_key(key)
-            chart_type = chart_types[i % len(chart_types)]  # Cycle through different chart types
             
             st.subheader(f"{pretty} — by Time of Day")
-            # pick an explicit id_col using common variants
-            id_col = None
-            for candidate in df.columns:
-                low = candidate.lower()
-                if "time of day" in low or "time of" in low or "time" == low or low.startswith("time ") or "time" in low or "hour" in low:
-                    id_col = candidate
-                    break
-            if id_col is None:
-                # fallback to first column
-                id_col = df.columns[0] if len(df.columns) > 0 else None
+            # pick an explicit id_col: the first column mentioning time or hour, else the first column
+            cols_l = df.columns.str.lower()
+            time_cols = df.columns[cols_l.str.contains("time", regex=False, na=False)
+                                   | cols_l.str.contains("hour", regex=False, na=False)]
+            id_col = time_cols[0] if len(time_cols) else _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, f"🕐 {pretty} — Time Analysis", chart_type)
 
@@ -1760,7 +2212,7 @@ elif selected_group == "⚔️ Weapons & Violence":
         if not df.empty:
             st.markdown("### 🔫 Weapon Usage in Crimes")
             st.markdown("*Analysis of different weapon types used in criminal offenses*")
-            id_col = df.columns[0] if len(df.columns) > 0 else None
+            id_col = _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, "🔫 Weapons Used in Offenses", "treemap")
     
@@ -1770,7 +2222,7 @@ elif selected_group == "⚔️ Weapons & Violence":
         if not df.empty:
             st.markdown("### 💀 Murder & Aggravated Assault Analysis")
             st.markdown("*Detailed analysis of murder and assault circumstances*")
-            id_col = df.columns[0] if len(df.columns) > 0 else None
+            id_col = _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, "💀 Murder & Assault Circumstances", "heatmap")
     
@@ -1784,13 +2236,13 @@ elif selected_group == "⚔️ Weapons & Violence":
             # Add key metrics first
             col1, col2 = st.columns(2)
             with col1:
-                total_cases = df.select_dtypes(include=[np.number]).sum().sum()
+                total_cases = _dataset_total("Justifiable Homicide")
                 st.metric("Total Cases", f"{total_cases:,.0f}")
             with col2:
                 categories = len(df)
                 st.metric("Circumstance Categories", f"{categories}")
             
-            id_col = df.columns[0] if len(df.columns) > 0 else None
+            id_col = _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, "⚖️ Justifiable Homicide Circumstances", "donut")
         else:
@@ -1812,7 +2264,7 @@ elif selected_group == "💊 Substance Analytics":
             st.markdown("*Analysis of drug-related incidents and their patterns across different categories*")
             
             # Use the first column as identifier and analyze patterns
-            id_col = df.columns[0] if len(df.columns) > 0 else None
+            id_col = _first_matching_col(df)
             if id_col:
                 create_interactive_chart(df, id_col, "🧪 Drug-Related Crime Analysis", "violin_chart")
     
@@ -1829,6 +2281,8 @@ elif selected_group == "💊 Substance Analytics":
     found_additional = False
     for fname in csv_files:
         if "drug" in fname.lower() and "seizure" not in fname.lower():
+            if not _csv_header(fname):
+                continue
             df_try = load_csv(fname)
             if df_try is None or df_try.empty:
                 continue
@@ -1845,10 +2299,10 @@ elif selected_group == "💊 Substance Analytics":
 
 elif selected_group == "🏢 Agency Deep Dive":
     st.subheader("🏢 Agency-Level Deep Dive Analysis")
-    possible = [f for f in os.listdir(".") if "united_states" in f.lower() or "offense_type_by_agency" in f.lower() or "us_offense" in f.lower()]
-    if possible:
-        preview = load_csv(possible[0])
-        st.success(f"📁 **Analyzing:** {possible[0]}")
+    agency_file = _find_agency_file(os.path.getmtime("."))
+    if agency_file:
+        preview = load_csv(agency_file)
+        st.success(f"📁 **Analyzing:** {agency_file}")
         st.markdown("### 🔍 Interactive Agency Data Explorer")
         st.info("💡 **Tip:** Use the filters below to explore specific agencies, states, or crime types. All charts are interactive!")
         # use the enhanced helper for filtered, paginated display
@@ -1865,7 +2319,7 @@ elif selected_group == "🏢 Agency Deep Dive":
 st.markdown("---")
 
 # Enhanced Footer
-st.markdown("""
+_FOOTER_HTML = """
 <div style='background: linear-gradient(90deg, #667eea, #764ba2); padding: 2rem; 
             border-radius: 10px; margin: 2rem 0; text-align: center; color: white;'>
     <h3 style='margin: 0;'>🚔 NIBRS Crime Analytics Hub</h3>
@@ -1880,6 +2334,8 @@ st.markdown("""
         Built with Streamlit & Plotly | Auto-processing enabled | All visualizations are interactive
     </p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_FOOTER_HTML, unsafe_allow_html=True)
 
 st.caption("💡 **Tip:** If any visualization shows missing data warnings, ensure all CSV files are in the project folder and properly formatted.")
\ No newline at end of file
@@ -3,9 +3,13 @@ import os
 import re
 import io
 import zipfile
+from functools import lru_cache
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import plotly.graph_objects as go
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 
 # try to import option_menu; fallback if not available
 try:
@@ -14,6 +18,17 @@ try:
 except Exception:
     HAS_OPTION_MENU = False
 
+# fragments (streamlit >= 1.37, earlier as experimental_fragment) rerun only the page body on
+# widget interaction; without them the decorated functions just run as part of the script
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+# numba is optional; numeric range filters fall back to pandas masks without it
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except Exception:
+    HAS_NUMBA = False
+
 # ----------------------------
 # App Title & Config
 # ----------------------------
@@ -48,17 +63,26 @@ HIDDEN_COLUMN_NAMES = [
     "Assisting or Promoting Prostitution","Purchasing Prostitution","Weapon Law Violations"
 ]
 
+_NORM_DASH = re.compile(r'[\u2013\u2014–—]')
+_NORM_NONALNUM = re.compile(r'[^0-9a-z]')
+
+@lru_cache(maxsize=4096)
 def _normalize_col_name(s: str) -> str:
     if s is None:
         return ""
     s = str(s).lower()
     # normalize dashes and remove non-alphanumeric so matching is tolerant
-    s = re.sub(r'[\u2013\u2014–—]', '-', s)
-    s = re.sub(r'[^0-9a-z]', '', s)
+    s = _NORM_DASH.sub('-', s)
+    s = _NORM_NONALNUM.sub('', s)
     return s
 
 HIDDEN_SET = set(_normalize_col_name(c) for c in HIDDEN_COLUMN_NAMES)
 
+@st.cache_data
+def _visible_columns(cols: tuple) -> tuple:
+    """Columns of a frame that are not in HIDDEN_SET (cached per column tuple)."""
+    return tuple(c for c in cols if _normalize_col_name(c) not in HIDDEN_SET)
+
 # ----------------------------
 # Compact styling / force inline pagination row
 # ----------------------------
@@ -114,6 +138,16 @@ st.markdown("Use the sidebar to navigate between chart groups. (Preprocessing ap
 # ----------------------------
 # Utility: cleaning & loading
 # ----------------------------
+# thousands separators and "anything that can't be part of a number"
+_COMMA = re.compile(r',')
+_NUM_STRIP = re.compile(r'[^\d.\-]')
+_WS_RE = re.compile(r"\s+")
+_UNNAMED_RE = re.compile(r"^Unnamed")
+_INDEX_LIKE_RE = re.compile(r'^(unnamed: 0|index|row|#|no\.?$|s no$|sr\.?n$|sr no$|id$)', re.IGNORECASE)
+_INDEX_STRIP_RE = re.compile(r'[^\d\-\+\.]')
+_NONALPHA = re.compile(r'[^a-z]')
+ARROW_STRING = "string[pyarrow]"
+
 def clean_colname(s: str) -> str:
     if pd.isna(s):
         return s
@@ -123,7 +157,7 @@ def clean_colname(s: str) -> str:
     s = s.replace("â\x88\x9215", "-15")
     s = s.replace("Nov-15", "11-15")
     s = s.replace("?", "-")
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s.strip()
 
 def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
@@ -139,45 +173,68 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [clean_colname(c) for c in df.columns]
 
     # drop unnamed columns
-    df = df.loc[:, ~df.columns.str.match(r"^Unnamed", na=False)]
+    df = df.loc[:, ~df.columns.str.match(_UNNAMED_RE, na=False)]
 
     # attempt to coerce numeric-like columns more robustly
     for col in df.columns:
-        # only process object / string columns
+        # only process object / string columns (numeric columns need no coercion)
         if df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype):
             # remove thousands separators and surrounding whitespace
-            cleaned = df[col].astype(str).str.replace(",", "").str.strip()
+            cleaned = df[col].astype(str).str.replace(_COMMA, "", regex=True).str.strip()
 
             # for matching we strip out characters except digits, minus, dot
-            cleaned_for_match = cleaned.str.replace(r'[^\d\.\-]', '', regex=True)
+            cleaned_for_match = cleaned.str.replace(_NUM_STRIP, "", regex=True)
 
             # remove empty strings (treat them as NaN for test)
-            non_null = cleaned_for_match[cleaned_for_match.notna() & (cleaned_for_match != "")]
+            non_null = cleaned_for_match.notna() & (cleaned_for_match != "")
 
-            if len(non_null) == 0:
+            if not non_null.any():
                 continue
 
-            # test how many values look like a number (integer or float)
-            numeric_match = non_null.str.match(r"^-?\d+(\.\d+)?$")
-            numeric_ratio = numeric_match.mean()
+            # let to_numeric decide what looks like a number (integer or float);
+            # this replaces the separate regex match pass over the column
+            coerced = pd.to_numeric(cleaned_for_match, errors="coerce")
 
-            # If a majority are numeric (>=50%) or they all match after stripping, coerce.
-            if numeric_ratio >= 0.5 or numeric_match.all():
-                df[col] = pd.to_numeric(cleaned_for_match, errors="coerce")
+            # If a majority are numeric (>=50%), coerce.
+            if coerced[non_null].notna().mean() >= 0.5:
+                df[col] = coerced
             else:
-                # leave as-is (text column)
-                df[col] = df[col].astype(object)
+                # leave as text (stored as Arrow strings below)
+                df[col] = df[col].astype(ARROW_STRING)
+
+    # keep text columns as contiguous Arrow strings: far smaller than object pointers
+    # and the .str / isin operations used by the filters run over flat buffers
+    for col in df.select_dtypes(include="object").columns:
+        df[col] = df[col].astype(ARROW_STRING)
+
+    # low-cardinality text with repeated values (State, Agency Type, ...) is stored as
+    # category codes, which also makes the filters' isin / nunique work on small ints
+    for col in df.select_dtypes(include="string").columns:
+        nu = df[col].nunique(dropna=True)
+        if 0 < nu < len(df) and nu <= max(50, len(df) // 100):
+            df[col] = df[col].astype("category")
+
+    # store numbers in the narrowest dtype that holds them: gap-free whole-number counts
+    # become int8/16/32, everything else float32 only if every value survives the round trip
+    # (downcast="float" checks range, not precision, and would round percentages)
+    for col in df.select_dtypes(include="number").columns:
+        s = df[col]
+        if s.notna().all() and ((s % 1) == 0).all():
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif s.dtype == np.float64:
+            narrow = s.astype(np.float32)
+            if narrow.astype(np.float64).equals(s):
+                df[col] = narrow
 
     # reset index first to get a clean base
     df = df.reset_index(drop=True)
 
     # detect an index-like column (common names) and use it if it's a unique integer sequence
-    index_like_pattern = re.compile(r'^(unnamed: 0|index|row|#|no\.?$|s no$|sr\.?n$|sr no$|id$)', re.IGNORECASE)
-    index_like_col = next((c for c in df.columns if index_like_pattern.match(c.strip())), None)
+    index_like_col = next((c for c in df.columns if _INDEX_LIKE_RE.match(c.strip())), None)
 
     if index_like_col:
         # try converting to numeric (strip non-digit characters)
-        conv = pd.to_numeric(df[index_like_col].astype(str).str.replace(r'[^\d\-\+\.]', '', regex=True), errors="coerce")
+        conv = pd.to_numeric(df[index_like_col].astype(str).str.replace(_INDEX_STRIP_RE, '', regex=True), errors="coerce")
         # check if conversion succeeded for all rows and values are integer-like and unique
         if conv.notna().all():
             # integer-like check (allow floats which are whole numbers)
@@ -204,18 +261,68 @@ def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-@st.cache_data
+# cleaned copies of the CSVs are kept here as Parquet so cold starts skip parsing + cleaning
+CACHE_DIR = ".cache"
+# bump whenever clean_dataframe changes what it produces, so stale sidecars are ignored
+_CLEAN_VERSION = 2
+
+def _parquet_cache_path(file_name):
+    """Sidecar Parquet path for a CSV, keyed on this app, the cleaning version and the CSV's
+    mtime + size; the other dashboard cleans differently, so the two never share a file."""
+    stat = os.stat(file_name)
+    return os.path.join(CACHE_DIR, f"{os.path.basename(file_name)}.app2.v{_CLEAN_VERSION}."
+                                   f"{stat.st_mtime_ns}.{stat.st_size}.parquet")
+
+def _read_csv_arrow(file_name, encoding="utf8"):
+    """Parse a CSV with pyarrow's multithreaded reader and hand back a pandas frame."""
+    table = pa_csv.read_csv(
+        file_name,
+        read_options=pa_csv.ReadOptions(block_size=1 << 22, use_threads=True, encoding=encoding),
+        # NIBRS headers wrap onto several lines inside quotes
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, null_values=["", "NA", "N/A"]),
+    )
+    # arrow falls back to raw bytes for text that isn't valid in this encoding; make the caller retry
+    if any(pa.types.is_binary(field.type) for field in table.schema):
+        raise ValueError(f"{file_name} is not valid {encoding}")
+    # name blank / repeated headers the way pd.read_csv does so clean_dataframe treats them the same
+    names, seen = [], {}
+    for i, name in enumerate(table.column_names):
+        if not name:
+            name = f"Unnamed: {i}"
+        elif name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return table.rename_columns(names).to_pandas()
+
+@st.cache_data(show_spinner=False, max_entries=64)
 def load_csv(file_name):
     if not os.path.exists(file_name):
         return pd.DataFrame()
+    cache_path = _parquet_cache_path(file_name)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception:
+            pass
     try:
-        df = pd.read_csv(file_name)
+        df = _read_csv_arrow(file_name)
     except Exception:
         try:
-            df = pd.read_csv(file_name, encoding="latin-1")
+            df = _read_csv_arrow(file_name, encoding="latin-1")
         except Exception:
             return pd.DataFrame()
-    return clean_dataframe(df)
+    df = clean_dataframe(df)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path, engine="pyarrow", compression="zstd")
+    except Exception:
+        # best effort only (read-only folder, mixed-type column, ...)
+        pass
+    return df
 
 # ----------------------------
 # Dataset mapping (added drug-related tables)
@@ -240,11 +347,26 @@ datasets_map = {
     # time tables are not explicitly mapped here; they will be discovered automatically
 }
 
-# load datasets (cleaned)
-loaded_data = {name: load_csv(path) for name, path in datasets_map.items()}
+# load datasets (cleaned) lazily: each table is read the first time a page asks for it
+class _LazyData(dict):
+    def __missing__(self, k):
+        v = load_csv(datasets_map[k])
+        self[k] = v
+        return v
+
+loaded_data = _LazyData()
+
+# list CSVs in folder (for on-the-fly discovery); cached so reruns skip the directory scan
+@st.cache_data(ttl=60)
+def _discover_csvs():
+    with os.scandir(".") as entries:
+        return tuple(e.name for e in entries if e.is_file() and e.name.lower().endswith(".csv"))
 
-# list CSVs in folder (for on-the-fly discovery)
-csv_files = [f for f in os.listdir(".") if f.lower().endswith(".csv")]
+csv_files = _discover_csvs()
+# lowercased name -> file name, so the pages match on names without re-lowering them each rerun
+_CSV_INDEX = {f.lower(): f for f in csv_files}
+# candidate time-of-day tables by filename ('time' also covers time_of_day / by_time / timeofday)
+_TIME_CSVS = {low: f for low, f in _CSV_INDEX.items() if "time" in low}
 
 # ----------------------------
 # Sidebar: compact menu only (no large file-list)
@@ -280,13 +402,15 @@ with st.sidebar:
     # quick download action
     if st.button("Download preview CSVs (zip)"):
         mem_zip = io.BytesIO()
-        with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        # 100-row previews barely compress, so store them instead of paying for zlib
+        with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_STORED) as zf:
             count = 0
-            for k, df in loaded_data.items():
+            for k in datasets_map:
+                df = loaded_data[k]
                 if df is None or df.empty:
                     continue
-                buf = io.StringIO()
-                df.head(100).to_csv(buf, index=False)
+                buf = io.BytesIO()
+                pa_csv.write_csv(pa.Table.from_pandas(df.head(100), preserve_index=False), buf)
                 zf.writestr(f"{k.replace(' ', '_')}_preview.csv", buf.getvalue())
                 count += 1
                 if count >= 6:
@@ -302,6 +426,16 @@ with st.sidebar:
 # Helper: stacked bar from df safely (prevents wide-form error)
 # - Added one-line caption generation under each chart
 # ----------------------------
+@st.cache_data
+def _stacked_bar_figure(df: pd.DataFrame, id_col: str, numeric_cols: tuple, title: str) -> go.Figure:
+    """One bar trace per numeric column, stacked; no long-form melt of the frame."""
+    fig = go.Figure()
+    for cat in numeric_cols:
+        fig.add_trace(go.Bar(name=cat, x=df[id_col], y=df[cat]))
+    fig.update_layout(barmode="stack", title=title, xaxis_title=id_col, yaxis_title="Value",
+                      legend_title_text="Category")
+    return fig
+
 def stacked_bar_from_df(df: pd.DataFrame, id_col: str, title: str):
     if df is None or df.empty:
         st.warning("⚠️ Dataset is empty.")
@@ -313,12 +447,10 @@ def stacked_bar_from_df(df: pd.DataFrame, id_col: str, title: str):
     if not numeric_cols:
         st.warning("⚠️ No numeric columns found for plotting. Available columns: " + ", ".join(df.columns.tolist()))
         return
-    melted = df.melt(id_vars=[id_col], value_vars=numeric_cols, var_name="Category", value_name="Value")
-    melted = melted.dropna(subset=["Value"])
-    if melted.empty:
-        st.warning("⚠️ No numeric values to plot after melting.")
+    if df[numeric_cols].isna().all().all():
+        st.warning("⚠️ No numeric values to plot.")
         return
-    fig = px.bar(melted, x=id_col, y="Value", color="Category", barmode="stack", title=title)
+    fig = _stacked_bar_figure(df, id_col, tuple(numeric_cols), title)
     st.plotly_chart(fig, use_container_width=True)
 
     # — Add a concise caption describing the chart
@@ -339,6 +471,7 @@ def stacked_bar_from_df(df: pd.DataFrame, id_col: str, title: str):
 # ----------------------------
 # Utilities for pretty titles
 # ----------------------------
+@lru_cache(maxsize=256)
 def pretty_title_from_key(key: str) -> str:
     """Return a friendly title for a dataset key or filename."""
     if key in datasets_map.keys():
@@ -355,6 +488,121 @@ def pretty_title_from_key(key: str) -> str:
 # ----------------------------
 # Agency-level helper: filters + compact pagination (placed AFTER the table)
 # ----------------------------
+# joins cells of a row so a search term can't match across two columns
+_SEARCH_SEP = "\x1f"
+
+def _frame_token(df: pd.DataFrame) -> int:
+    """Content fingerprint of a frame (row order and index included), used as a cheap cache key."""
+    return hash((tuple(df.columns), pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()))
+
+@st.cache_data
+def _column_profile(token: int, _df: pd.DataFrame):
+    """Split columns into numeric / text / categorical (<= 20 distinct) / free-text, once per dataset
+    (keyed on the frame's token rather than hashing the frame)."""
+    numeric_cols = tuple(_df.select_dtypes(include="number").columns)
+    text_cols = tuple(c for c in _df.columns if _df[c].dtype == object or pd.api.types.is_string_dtype(_df[c])
+                      or isinstance(_df[c].dtype, pd.CategoricalDtype))
+    nuniques = {c: _df[c].nunique(dropna=True) for c in text_cols}
+    cat_cols = tuple(c for c in text_cols if 0 < nuniques[c] <= 20)
+    free_text_cols = tuple(c for c in text_cols if c not in cat_cols)
+    return numeric_cols, text_cols, cat_cols, free_text_cols
+
+@st.cache_data
+def _numeric_bounds(token: int, cols: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    """min / max rows for every numeric column in one aggregation (all-NaN columns get 0.0)."""
+    if not cols:
+        return pd.DataFrame(index=["min", "max"])
+    return _df[list(cols)].agg(["min", "max"]).astype(float).fillna(0.0)
+
+@st.cache_data
+def _search_blob(token: int, cols: tuple, _df: pd.DataFrame) -> pd.Series:
+    """Lower-cased text of `cols` joined per row, so full-text search is a single scan.
+    Keyed on the frame's token; the frame itself is not hashed."""
+    if not cols:
+        return pd.Series("", index=_df.index)
+    first, *rest = cols
+    blob = _df[first].astype(ARROW_STRING).str.cat([_df[c].astype(ARROW_STRING) for c in rest], sep=_SEARCH_SEP, na_rep="")
+    return blob.str.lower()
+
+# below this many rows the JIT / thread start-up costs more than the pandas masks it replaces
+NUMBA_MIN_ROWS = 10_000
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _range_mask_kernel(arr, lows, highs):
+        """Row mask for arr[:, j] within [lows[j], highs[j]] for every j (NaN never matches)."""
+        n, m = arr.shape
+        out = np.ones(n, dtype=np.bool_)
+        for i in prange(n):
+            for j in range(m):
+                v = arr[i, j]
+                if not (lows[j] <= v <= highs[j]):
+                    out[i] = False
+                    break
+        return out
+
+def _apply_agency_filters(df: pd.DataFrame, token: int, text_cols: tuple, numeric_cols: tuple) -> pd.DataFrame:
+    """Apply the filters stored in session_state to df (whose _frame_token is `token`). Every
+    step indexes into a new frame, so df itself is never modified."""
+    filtered = df
+
+    # apply full-text search
+    search_val = st.session_state.get("agency_filter_search", "").strip()
+    if search_val:
+        # search runs first, so `filtered` is still df and its token applies
+        blob = _search_blob(token, text_cols, filtered)
+        filtered = filtered[blob.str.contains(search_val.lower(), regex=False, na=False)]
+
+    # apply categorical filters
+    for col in text_cols:
+        key = f"agency_filter_cat__{col}"
+        if key in st.session_state:
+            sel = st.session_state[key]
+            if sel:
+                filtered = filtered[filtered[col].isin(sel)]
+
+    # apply numeric filters (columns are already numeric; combine into one mask, one indexing step)
+    num_ranges = []
+    for col in numeric_cols:
+        key = f"agency_filter_num__{col}"
+        if key in st.session_state:
+            rng = st.session_state[key]
+            try:
+                num_ranges.append((col, float(rng[0]), float(rng[1])))
+            except Exception:
+                pass
+    if num_ranges:
+        if HAS_NUMBA and len(filtered) >= NUMBA_MIN_ROWS:
+            cols, lows, highs = zip(*num_ranges)
+            arr = filtered[list(cols)].to_numpy(dtype=np.float64, na_value=np.nan)
+            mask = _range_mask_kernel(arr, np.array(lows), np.array(highs))
+        else:
+            mask = np.logical_and.reduce([filtered[col].between(low, high) for col, low, high in num_ranges])
+        filtered = filtered[mask]
+
+    # apply per-column text searches (combined into one mask, one indexing step)
+    text_masks = []
+    for col in text_cols:
+        key = f"agency_filter_text__{col}"
+        if key in st.session_state:
+            v = st.session_state[key].strip()
+            if v:
+                text_masks.append(filtered[col].astype(ARROW_STRING).str.contains(v, case=False, na=False))
+    if text_masks:
+        filtered = filtered[np.logical_and.reduce(text_masks)]
+
+    return filtered
+
+_AGENCY_FILTER_KEYS = ("agency_filter_search", "agency_filter_cat__", "agency_filter_num__", "agency_filter_text__")
+
+def _applied_filter_state() -> tuple:
+    """Hashable snapshot of the applied (not just edited) agency filters in session_state."""
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, (list, tuple)) else v)
+        for k, v in st.session_state.items()
+        if k.startswith(_AGENCY_FILTER_KEYS) and not k.endswith("_widget")
+    ))
+
 def agency_table_with_filters(df: pd.DataFrame):
     """
     Displays the agency-level dataframe with advanced filters and a compact pagination
@@ -365,17 +613,15 @@ def agency_table_with_filters(df: pd.DataFrame):
         return
 
     # Reset index to simple RangeIndex (we will set left-gutter numbering later)
-    df = df.reset_index(drop=True).copy()
+    df = df.reset_index(drop=True)
+    token = _frame_token(df)
+
+    # collect column types (low-cardinality text cols are treated as categorical choices);
+    # filtering only drops rows, so these also hold for `filtered` below
+    numeric_cols, text_cols, cat_cols, free_text_cols = _column_profile(token, df)
 
     st.markdown("### Advanced Filters")
     with st.expander("Open filters", expanded=False):
-        # collect column types
-        numeric_cols = df.select_dtypes(include="number").columns.tolist()
-        text_cols = [c for c in df.columns if df[c].dtype == object or pd.api.types.is_string_dtype(df[c])]
-        # treat low-cardinality text cols as categorical choices
-        cat_cols = [c for c in text_cols if df[c].nunique(dropna=True) <= 20 and df[c].nunique(dropna=True) > 0]
-        free_text_cols = [c for c in text_cols if c not in cat_cols]
-
         # form keys for session_state
         sess_prefix = "agency_filter_"
 
@@ -389,21 +635,21 @@ def agency_table_with_filters(df: pd.DataFrame):
         for col in cat_cols:
             key = sess_prefix + f"cat__{col}"
             default = st.session_state.get(key, [])
-            opts = sorted([v for v in df[col].dropna().unique()])
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # categories are already the sorted distinct values
+                opts = list(df[col].cat.categories)
+            else:
+                opts = sorted([v for v in df[col].dropna().unique()])
             sel = st.multiselect(f"{col}", options=opts, default=default, key=key + "_widget")
             cat_selected[col] = (key, sel)
 
         # Numeric range filters
         num_selected = {}
+        bounds = _numeric_bounds(token, numeric_cols, df)
         for col in numeric_cols:
             key = sess_prefix + f"num__{col}"
             cur_default = st.session_state.get(key, None)
-            # safely get min and max
-            try:
-                col_min = float(pd.to_numeric(df[col], errors="coerce").min() if not df[col].dropna().empty else 0.0)
-                col_max = float(pd.to_numeric(df[col], errors="coerce").max() if not df[col].dropna().empty else 0.0)
-            except Exception:
-                col_min, col_max = 0.0, 0.0
+            col_min, col_max = float(bounds.at["min", col]), float(bounds.at["max", col])
             # decide defaults
             if cur_default and isinstance(cur_default, (list, tuple)) and len(cur_default) == 2:
                 low_default, high_default = cur_default[0], cur_default[1]
@@ -450,47 +696,19 @@ def agency_table_with_filters(df: pd.DataFrame):
                 del st.session_state["agency_filter__page_size"]
             st.session_state["agency_filter__page"] = 1
 
-    # Build filtered view based on session_state values (if present)
-    filtered = df.copy()
-
-    # apply full-text search
-    search_val = st.session_state.get("agency_filter_search", "").strip()
-    if search_val:
-        mask = pd.Series(False, index=filtered.index)
-        for col in (filtered.select_dtypes(include="object").columns.tolist()):
-            mask = mask | filtered[col].astype(str).str.contains(search_val, case=False, na=False)
-        filtered = filtered[mask]
-
-    # apply categorical filters
-    for col in filtered.select_dtypes(include="object").columns.tolist():
-        key = f"agency_filter_cat__{col}"
-        if key in st.session_state:
-            sel = st.session_state[key]
-            if sel:
-                filtered = filtered[filtered[col].isin(sel)]
-
-    # apply numeric filters
-    for col in filtered.select_dtypes(include="number").columns.tolist():
-        key = f"agency_filter_num__{col}"
-        if key in st.session_state:
-            rng = st.session_state[key]
-            try:
-                low, high = float(rng[0]), float(rng[1])
-                filtered = filtered[(pd.to_numeric(filtered[col], errors="coerce") >= low) & (pd.to_numeric(filtered[col], errors="coerce") <= high)]
-            except Exception:
-                pass
-
-    # apply per-column text searches
-    for col in filtered.select_dtypes(include="object").columns.tolist():
-        key = f"agency_filter_text__{col}"
-        if key in st.session_state:
-            v = st.session_state[key].strip()
-            if v:
-                filtered = filtered[filtered[col].astype(str).str.contains(v, case=False, na=False)]
+    # Build filtered view based on session_state values (if present); paging, sorting and
+    # column picks don't change it, so reuse the previous result until a filter is applied
+    filter_key = (token, _applied_filter_state())
+    cached = st.session_state.get("_agency_filtered_cache")
+    if cached is not None and cached[0] == filter_key:
+        filtered = cached[1]
+    else:
+        filtered = _apply_agency_filters(df, token, text_cols, numeric_cols)
+        st.session_state["_agency_filtered_cache"] = (filter_key, filtered)
 
     # -------------------------
     # Filter out hidden columns for display and selection
-    visible_cols = [c for c in filtered.columns if _normalize_col_name(c) not in HIDDEN_SET]
+    visible_cols = list(_visible_columns(tuple(filtered.columns)))
     # if no visible columns left, fallback to showing all (avoid empty UI)
     if not visible_cols:
         visible_cols = list(filtered.columns)
@@ -502,17 +720,12 @@ def agency_table_with_filters(df: pd.DataFrame):
     selected_columns = st.multiselect("Columns to display", options=visible_cols, default=default_cols, key="agency_cols_widget")
     st.session_state[cols_key] = selected_columns if selected_columns else visible_cols
     # apply selection to filtered display
-    display_filtered = filtered.copy()
-    if selected_columns:
-        display_filtered = display_filtered[selected_columns]
-    else:
-        display_filtered = display_filtered[visible_cols]
+    display_filtered = filtered.loc[:, selected_columns if selected_columns else visible_cols]
 
-    # --- IMPORTANT: remove state names from any column that normalizes to "state"
-    for col in list(display_filtered.columns):
-        if _normalize_col_name(col) == "state":
-            # replace state values with blank strings so state names are not visible or exported
-            display_filtered[col] = ""
+    # --- IMPORTANT: state names must never be visible or exported. Columns that normalize to
+    # "state" are blanked on the CSV export and on the displayed page slice only, instead of
+    # rewriting the whole filtered frame on every rerun.
+    state_cols = [col for col in display_filtered.columns if _normalize_col_name(col) == "state"]
 
     # NOTE: the selected-columns chip row was intentionally REMOVED per request:
     # the multiselect box is the single place to add/remove visible columns.
@@ -529,10 +742,25 @@ def agency_table_with_filters(df: pd.DataFrame):
         dir_choice = st.radio("Sort direction", options=["asc", "desc"], index=0 if default_dir == "asc" else 1, horizontal=True, key="agency_sort_dir_widget")
         st.session_state[sort_key] = sort_col
         st.session_state[sort_dir_key] = dir_choice
-        try:
-            display_filtered = display_filtered.sort_values(by=sort_col, ascending=(dir_choice == "asc"), na_position="last")
-        except Exception:
-            pass
+        # the sort order only changes with the filter result, shown columns, column or direction,
+        # so page clicks reuse the stored row positions instead of re-sorting
+        sort_cache_key = (filter_key, tuple(display_filtered.columns), sort_col, dir_choice)
+        sorted_pos = None
+        if st.session_state.get("_agency_sort_cache_key") == sort_cache_key:
+            sorted_pos = st.session_state["_agency_sort_pos"]
+        else:
+            try:
+                sorted_pos = (display_filtered[sort_col].reset_index(drop=True)
+                              .sort_values(ascending=(dir_choice == "asc"), na_position="last")
+                              .index.to_numpy())
+            except TypeError:
+                # mixed-type column that can't be ordered: say so and show the rows unsorted
+                st.warning(f"Cannot sort by '{sort_col}': its values are not comparable.")
+            else:
+                st.session_state["_agency_sort_pos"] = sorted_pos
+                st.session_state["_agency_sort_cache_key"] = sort_cache_key
+        if sorted_pos is not None:
+            display_filtered = display_filtered.iloc[sorted_pos]
     else:
         if sort_key in st.session_state:
             del st.session_state[sort_key]
@@ -542,10 +770,7 @@ def agency_table_with_filters(df: pd.DataFrame):
     # Provide dataset summary and download (download only includes visible/display columns)
     st.markdown(f"**Filtered rows:** {len(filtered):,}")
     # Ensure exported CSV also has no state names in 'State' columns
-    export_df = display_filtered.copy()
-    for col in list(export_df.columns):
-        if _normalize_col_name(col) == "state":
-            export_df[col] = ""
+    export_df = display_filtered.assign(**{col: "" for col in state_cols}) if state_cols else display_filtered
     csv_bytes = export_df.to_csv(index=False).encode("utf-8")
     st.download_button("Download filtered CSV", data=csv_bytes, file_name="agency_filtered.csv", mime="text/csv")
 
@@ -579,6 +804,9 @@ def agency_table_with_filters(df: pd.DataFrame):
     start_idx = (curr_page - 1) * page_size_val
     end_idx = start_idx + page_size_val
     page_df = display_filtered.iloc[start_idx:end_idx].copy()
+    for col in state_cols:
+        # replace state values with blank strings so state names are not visible
+        page_df[col] = ""
 
     # set left-gutter index to reflect overall position (1-based)
     page_df.index = pd.RangeIndex(start=start_idx + 1, stop=start_idx + 1 + len(page_df))
@@ -653,29 +881,103 @@ def agency_table_with_filters(df: pd.DataFrame):
 # ----------------------------
 # Chart Rendering Functions
 # ----------------------------
+@st.cache_data
+def _lower_cols(columns: tuple) -> dict:
+    """{lowercased name: original name} for a frame's columns (first one wins on clashes)."""
+    lower = {}
+    for c in columns:
+        lower.setdefault(str(c).lower(), c)
+    return lower
+
+def _first_col(df: pd.DataFrame):
+    """First column name of df, or None if it has no columns."""
+    cols = df.columns
+    return cols[0] if len(cols) else None
+
+# a column name that looks like time of day: 'time', 'time of ...', 'unknown time', 'hour', a.m./p.m.
+_TIME_RE = re.compile(r'time of|^time$|time |hour|a\.m\.|p\.m\.|\bam\b|\bpm\b|unknown time')
+
+def has_time_like_column(df):
+    """True if df likely has a time-of-day column."""
+    if df is None or df.empty:
+        return False
+    return any(_TIME_RE.search(low) for low in _lower_cols(tuple(df.columns)))
+
+@st.cache_data
+def _time_like_map(keys_and_cols: tuple) -> dict:
+    """{dataset key: has a time-of-day column} for (key, column names) pairs."""
+    return {k: any(_TIME_RE.search(str(c).lower()) for c in cols) for k, cols in keys_and_cols}
+
+def _offense_category_col(df: pd.DataFrame):
+    """The 'Offense Category' column of a table, else its first column (None if it has none)."""
+    lower = _lower_cols(tuple(df.columns))
+    return next((orig for low, orig in lower.items() if "offense" in low and "category" in low), _first_col(df))
+
+# state name (lowercase, letters only) -> USPS code
+_STATE_NAME_TO_CODE = {
+    'alabama':'AL','alaska':'AK','arizona':'AZ','arkansas':'AR','california':'CA','colorado':'CO','connecticut':'CT','delaware':'DE','florida':'FL','georgia':'GA','hawaii':'HI','idaho':'ID','illinois':'IL','indiana':'IN','iowa':'IA','kansas':'KS','kentucky':'KY','louisiana':'LA','maine':'ME','maryland':'MD','massachusetts':'MA','michigan':'MI','minnesota':'MN','mississippi':'MS','missouri':'MO','montana':'MT','nebraska':'NE','nevada':'NV','new hampshire':'NH','new jersey':'NJ','new mexico':'NM','new york':'NY','north carolina':'NC','north dakota':'ND','ohio':'OH','oklahoma':'OK','oregon':'OR','pennsylvania':'PA','rhode island':'RI','south carolina':'SC','south dakota':'SD','tennessee':'TN','texas':'TX','utah':'UT','vermont':'VT','virginia':'VA','washington':'WA','west virginia':'WV','wisconsin':'WI','wyoming':'WY','district of columbia':'DC'
+}
+_STATE_CODES = frozenset(_STATE_NAME_TO_CODE.values())
+# one lookup for both spellings: full names and the (lowercased) codes themselves
+_STATE_LOOKUP = {**_STATE_NAME_TO_CODE, **{code.lower(): code for code in _STATE_CODES}}
+
+@st.cache_data
+def _prep_state_df(df_raw: pd.DataFrame, state_col: str, agencies_col: str) -> pd.DataFrame:
+    """Numeric value column + USPS `_state_code` for the choropleth, rows without a code dropped."""
+    # work on just the two columns used instead of copying the whole table
+    df = df_raw.loc[:, [state_col, agencies_col]]
+    # clean_dataframe usually leaves this numeric already; only strip/parse leftover text
+    if not pd.api.types.is_numeric_dtype(df[agencies_col]):
+        try:
+            df[agencies_col] = pd.to_numeric(df[agencies_col].astype(ARROW_STRING).str.replace(",", "", regex=False).str.strip(), errors="coerce")
+        except Exception:
+            pass
+
+    # one vectorized pass over the column (Arrow strings keep lower/replace in pyarrow's kernels):
+    # names and existing USPS codes normalize to the same kind of key and share one lookup
+    key = df[state_col].astype(ARROW_STRING).str.lower().str.replace(_NONALPHA, "", regex=True)
+    df["_state_code"] = key.map(_STATE_LOOKUP)
+    return df.loc[df["_state_code"].notna()]
+
+@st.cache_data
+def _state_choropleth(df_map: pd.DataFrame, state_col: str, agencies_col: str) -> go.Figure:
+    """US state choropleth built directly as a go.Choropleth trace (no plotly.express pass)."""
+    fig = go.Figure(go.Choropleth(
+        locations=df_map["_state_code"].to_numpy(),
+        z=df_map[agencies_col].to_numpy(),
+        locationmode="USA-states",
+        colorscale="Viridis",
+        colorbar_title_text=agencies_col,
+        text=df_map[state_col].to_numpy(),
+        hovertemplate="<b>%{text}</b><br>" + agencies_col + "=%{z}<extra></extra>",
+    ))
+    fig.update_layout(geo_scope="usa", title="Participation by State")
+    return fig
+
+@st.cache_data
+def _arrow_preview(df: pd.DataFrame, cols: tuple, sort_col: str, n: int = 20) -> pa.Table:
+    """Top `n` rows by `sort_col` as an Arrow table, ready for st.dataframe without re-conversion."""
+    # only the top rows are shown, so take them with nlargest instead of sorting every row
+    preview_df = df[list(cols)].nlargest(n, sort_col).reset_index(drop=True)
+    # set 1-based index so Streamlit shows 1..N in the left gutter (no extra column)
+    preview_df.index = pd.RangeIndex(start=1, stop=len(preview_df) + 1)
+    return pa.Table.from_pandas(preview_df)
+
+@_fragment
 def plot_state_heatmap():
-    df = loaded_data.get("Participation by State", pd.DataFrame())
+    df = loaded_data["Participation by State"] if "Participation by State" in datasets_map else pd.DataFrame()
     if df is None or df.empty:
         st.warning("⚠️ Participation by State dataset not loaded or empty.")
         return
 
-    state_col = None
-    for c in df.columns:
-        if c.strip().lower() == "state":
-            state_col = c
-            break
+    lower = _lower_cols(tuple(df.columns))
+    state_col = lower.get("state")
     if state_col is None:
-        for c in df.columns:
-            if "state" in c.lower():
-                state_col = c
-                break
+        state_col = next((orig for low, orig in lower.items() if "state" in low), None)
 
     agencies_col = None
     for candidate in ["Number of Participating Agencies", "Population Covered", "Population", "Number of Agencies", "Participating Agencies", "Agencies"]:
-        for c in df.columns:
-            if candidate.lower() == c.lower():
-                agencies_col = c
-                break
+        agencies_col = lower.get(candidate.lower())
         if agencies_col:
             break
 
@@ -693,43 +995,13 @@ def plot_state_heatmap():
         st.write(df.columns.tolist())
         return
 
-    try:
-        df[agencies_col] = pd.to_numeric(df[agencies_col].astype(str).str.replace(",", "").str.strip(), errors="coerce")
-    except Exception:
-        pass
-
-    def maybe_state_code(s):
-        s = str(s).strip()
-        if len(s) == 2 and s.isalpha():
-            return s.upper()
-        return s
-
-    df["_state_for_map"] = df[state_col].apply(maybe_state_code)
-
-    state_map_simple = {
-        'alabama':'AL','alaska':'AK','arizona':'AZ','arkansas':'AR','california':'CA','colorado':'CO','connecticut':'CT','delaware':'DE','florida':'FL','georgia':'GA','hawaii':'HI','idaho':'ID','illinois':'IL','indiana':'IN','iowa':'IA','kansas':'KS','kentucky':'KY','louisiana':'LA','maine':'ME','maryland':'MD','massachusetts':'MA','michigan':'MI','minnesota':'MN','mississippi':'MS','missouri':'MO','montana':'MT','nebraska':'NE','nevada':'NV','new hampshire':'NH','new jersey':'NJ','new mexico':'NM','new york':'NY','north carolina':'NC','north dakota':'ND','ohio':'OH','oklahoma':'OK','oregon':'OR','pennsylvania':'PA','rhode island':'RI','south carolina':'SC','south dakota':'SD','tennessee':'TN','texas':'TX','utah':'UT','vermont':'VT','virginia':'VA','washington':'WA','west virginia':'WV','wisconsin':'WI','wyoming':'WY','district of columbia':'DC'
-    }
-    def to_code(val):
-        if pd.isna(val):
-            return None
-        s = str(val).strip()
-        if len(s) == 2 and s.isalpha():
-            return s.upper()
-        key = re.sub(r'[^a-z]', '', s.lower())
-        return state_map_simple.get(key, None)
-
-    df["_state_code"] = df[state_col].apply(to_code)
-    df_map = df[df["_state_code"].notna()].copy()
+    df_map = _prep_state_df(df, state_col, agencies_col)
     if df_map.empty:
         st.warning("⚠️ No rows with valid US state codes after mapping. Showing table preview instead.")
         st.dataframe(df.head(20))
         return
 
-    fig = px.choropleth(df_map, locations="_state_code", locationmode="USA-states",
-                        color=agencies_col, hover_name=state_col,
-                        hover_data=[agencies_col], scope="usa",
-                        color_continuous_scale="viridis",
-                        title="Participation by State")
+    fig = _state_choropleth(df_map, state_col, agencies_col)
     st.plotly_chart(fig, use_container_width=True)
 
     # Add one-line description for the map
@@ -737,76 +1009,122 @@ def plot_state_heatmap():
 
     st.write("Preview:")
     # --- Display preview using Streamlit's dataframe style but with a 1-based index ---
-    preview_df = df_map[[state_col, agencies_col, "_state_code"]].sort_values(by=agencies_col, ascending=False).reset_index(drop=True)
-    # set 1-based index so Streamlit shows 1..N in the left gutter (no extra column)
-    preview_df.index = pd.RangeIndex(start=1, stop=len(preview_df) + 1)
-    st.dataframe(preview_df.head(20), use_container_width=True)
+    st.dataframe(_arrow_preview(df_map, (state_col, agencies_col, "_state_code"), agencies_col), use_container_width=True)
 
-def plot_victim_analysis():
-    if "Victims Age" in loaded_data:
-        df = loaded_data["Victims Age"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Victims by Age Category")
-    if "Victims Sex" in loaded_data:
-        df = loaded_data["Victims Sex"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Victims by Sex")
-    if "Victims Race" in loaded_data:
-        df = loaded_data["Victims Race"]
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()),
-                      df.columns[0] if len(df.columns) > 0 else None)
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Victims by Race")
+# Per-page stacked bar charts: (dataset key, chart title, use the offense-category column as x
+# instead of the first column)
+_OTHER_CHARTS = [
+    ("Victim-Offender Relationship", "Victim-Offender Relationship by Offense", False),
+    ("Property Crimes by Location", "Property Crimes by Location", False),
+]
+_GROUPS = {
+    "Victims": [
+        ("Victims Age", "Victims by Age Category", True),
+        ("Victims Sex", "Victims by Sex", True),
+        ("Victims Race", "Victims by Race", True),
+    ],
+    "Offenders": [
+        ("Offenders Age", "Offenders by Age Category", False),
+        ("Offenders Sex", "Offenders by Sex", False),
+        ("Offenders Race", "Offenders by Race", False),
+    ],
+    "Arrestees": [
+        ("Arrestees Age", "Arrestees by Age Category", False),
+        ("Arrestees Sex", "Arrestees by Sex", False),
+        ("Arrestees Race", "Arrestees by Race", False),
+    ],
+    "Crimes by Location": _OTHER_CHARTS,
+    "Weapons & Circumstances": _OTHER_CHARTS,
+}
 
-def plot_offender_analysis():
-    if "Offenders Age" in loaded_data:
-        df = loaded_data["Offenders Age"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Offenders by Age Category")
-    if "Offenders Sex" in loaded_data:
-        df = loaded_data["Offenders Sex"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Offenders by Sex")
-    if "Offenders Race" in loaded_data:
-        df = loaded_data["Offenders Race"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
+@_fragment
+def _plot_group(group_name: str):
+    for key, title, by_category in _GROUPS[group_name]:
+        if key not in datasets_map:
+            continue
+        df = loaded_data[key]
+        id_col = _offense_category_col(df) if by_category else _first_col(df)
         if id_col:
-            stacked_bar_from_df(df, id_col, "Offenders by Race")
+            stacked_bar_from_df(df, id_col, title)
 
-def plot_arrestee_analysis():
-    if "Arrestees Age" in loaded_data:
-        df = loaded_data["Arrestees Age"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Arrestees by Age Category")
-    if "Arrestees Sex" in loaded_data:
-        df = loaded_data["Arrestees Sex"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Arrestees by Sex")
-    if "Arrestees Race" in loaded_data:
-        df = loaded_data["Arrestees Race"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Arrestees by Race")
+@_fragment
+def _page_crimes_by_time():
+    # discover time-related datasets (both mapped loaded_data and raw CSV filenames);
+    # mapped datasets first, with the per-table verdict cached on the column names
+    time_like = _time_like_map(tuple((k, tuple(loaded_data[k].columns)) for k in datasets_map))
+    time_related = [(k, loaded_data[k]) for k in datasets_map if time_like[k]]
 
-def plot_other_analysis():
-    if "Victim-Offender Relationship" in loaded_data:
-        df = loaded_data["Victim-Offender Relationship"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Victim-Offender Relationship by Offense")
-    if "Property Crimes by Location" in loaded_data:
-        df = loaded_data["Property Crimes by Location"]
-        id_col = df.columns[0] if len(df.columns)>0 else None
-        if id_col:
-            stacked_bar_from_df(df, id_col, "Property Crimes by Location")
+    # also scan csv filenames for time-related tables (load on the fly)
+    seen = {os.path.basename(str(k)).lower() for k, _ in time_related}
+    for low, fname in _TIME_CSVS.items():
+        # don't duplicate if same logical dataset already in list
+        if low in seen:
+            continue
+        df_try = load_csv(fname)
+        if has_time_like_column(df_try):
+            time_related.append((fname, df_try))
+            seen.add(low)
+
+    # show a helpful message only if none found
+    if not time_related:
+        st.info("Time-based plots will appear if your CSVs include time-of-day / time columns (e.g. 'Time of Day'). No time-based datasets were found automatically.")
+    else:
+        # display each discovered dataset using a pretty title (no raw filename printed)
+        for key, df in time_related:
+            pretty = pretty_title_from_key(key)
+            st.subheader(f"{pretty} — by Time of Day")
+            # pick an explicit id_col using common variants
+            id_col = next((orig for low, orig in _lower_cols(tuple(df.columns)).items()
+                           if "time" in low or "hour" in low), None)
+            if id_col is None:
+                # fallback to first column
+                id_col = _first_col(df)
+            if id_col:
+                stacked_bar_from_df(df, id_col, f"{pretty} — by {id_col}")
+
+@_fragment
+def _page_drugs_alcohol():
+    # find any loaded datasets whose friendly key mentions drug or alcohol
+    found = False
+    for key in datasets_map:
+        if "drug" in key.lower() or "alcohol" in key.lower():
+            df = loaded_data[key]
+            if df is None or df.empty:
+                continue
+            found = True
+            st.subheader(pretty_title_from_key(key))
+            # try to pick sensible id column (first textual column)
+            id_col = next((c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])), _first_col(df))
+            if id_col:
+                stacked_bar_from_df(df, id_col, pretty_title_from_key(key))
+    # additionally scan CSV filenames (in case some drug files were not in the mapping)
+    seen = {pretty_title_from_key(k).lower() for k in datasets_map}
+    for low, fname in _CSV_INDEX.items():
+        if "drug" in low or "alcohol" in low:
+            # avoid duplicates if we already displayed the mapped one
+            if pretty_title_from_key(fname).lower() in seen:
+                continue
+            df_try = load_csv(fname)
+            if df_try is None or df_try.empty:
+                continue
+            found = True
+            st.subheader(pretty_title_from_key(fname))
+            id_col = next((c for c in df_try.columns if not pd.api.types.is_numeric_dtype(df_try[c])), _first_col(df_try))
+            if id_col:
+                stacked_bar_from_df(df_try, id_col, pretty_title_from_key(fname))
+    if not found:
+        st.warning("No drug/alcohol datasets detected in the mapped files. Make sure the drug/alcohol CSVs are next to app.py; their filenames often contain 'drug' or 'alcohol'.")
+
+@_fragment
+def _page_agency_level():
+    possible = [f for low, f in _CSV_INDEX.items() if "united_states" in low or "offense_type_by_agency" in low or "us_offense" in low]
+    if possible:
+        preview = load_csv(possible[0])
+        st.write("File:", possible[0])
+        # use the helper for filtered, paginated display (keeps Streamlit table style)
+        agency_table_with_filters(preview)
+    else:
+        st.info("Place the US_Offense_Agency CSV next to app.py with name containing 'united_states' or 'us_offense'.")
 
 # ----------------------------
 # Page Logic
@@ -818,7 +1136,7 @@ if selected_group == "Geospatial / State-Level":
 
 elif selected_group == "Participation & Agencies":
     st.subheader("🏛 Participation & Agency-level")
-    df = loaded_data.get("Participation by State", pd.DataFrame())
+    df = loaded_data["Participation by State"] if "Participation by State" in datasets_map else pd.DataFrame()
     if df is not None and not df.empty:
         # show first 20 rows with 1-based left index (no explicit Index column)
         display_df = df.reset_index(drop=True).copy()
@@ -829,9 +1147,9 @@ elif selected_group == "Participation & Agencies":
 
 elif selected_group == "Incidents & Offenses":
     st.subheader("📈 Incidents & Offenses")
-    df = loaded_data.get("Incidents & Offenses", pd.DataFrame())
+    df = loaded_data["Incidents & Offenses"] if "Incidents & Offenses" in datasets_map else pd.DataFrame()
     if df is not None and not df.empty:
-        id_col = next((c for c in df.columns if "offense" in c.lower() and "category" in c.lower()), df.columns[0] if len(df.columns)>0 else None)
+        id_col = _offense_category_col(df)
         if id_col:
             stacked_bar_from_df(df, id_col, "Incidents & Offenses (stacked)")
     else:
@@ -839,120 +1157,35 @@ elif selected_group == "Incidents & Offenses":
 
 elif selected_group == "Victims":
     st.subheader("🧍 Victims Analysis")
-    plot_victim_analysis()
+    _plot_group(selected_group)
 
 elif selected_group == "Offenders":
     st.subheader("👥 Offender Analysis")
-    plot_offender_analysis()
+    _plot_group(selected_group)
 
 elif selected_group == "Arrestees":
     st.subheader("🚓 Arrestee Analysis")
-    plot_arrestee_analysis()
+    _plot_group(selected_group)
 
 elif selected_group == "Crimes by Location":
     st.subheader("📍 Crimes by Location")
-    plot_other_analysis()
+    _plot_group(selected_group)
 
 elif selected_group == "Crimes by Time":
     st.subheader("🕒 Crimes by Time")
-
-    # discover time-related datasets (both mapped loaded_data and raw CSV filenames)
-    time_related = []
-
-    # helper to decide if df likely has time-of-day column
-    def has_time_like_column(df):
-        if df is None or df.empty:
-            return False
-        for c in df.columns:
-            low = c.lower()
-            # look for 'time of', 'time', 'hour', 'a.m.', 'p.m.', 'am', 'pm', 'unknown time'
-            if ("time of" in low) or ("time" == low) or ("time " in low) or ("hour" in low) or ("a.m." in low) or ("p.m." in low) or re.search(r'\bam\b|\bpm\b', low) or ("unknown time" in low) or ("time of day" in low):
-                return True
-        return False
-
-    # search loaded (mapped) datasets first
-    for key, df in loaded_data.items():
-        if has_time_like_column(df):
-            time_related.append((key, df))
-
-    # also scan csv filenames for time-related tables (load on the fly)
-    for fname in csv_files:
-        low = fname.lower()
-        if "time" in low or "time_of_day" in low or "by_time" in low or "timeofday" in low:
-            df_try = load_csv(fname)
-            if has_time_like_column(df_try):
-                # don't duplicate if same logical dataset already in list
-                already = any(os.path.basename(str(k)).lower() == fname.lower() or k == fname for k, _ in time_related)
-                if not already:
-                    time_related.append((fname, df_try))
-
-    # show a helpful message only if none found
-    if not time_related:
-        st.info("Time-based plots will appear if your CSVs include time-of-day / time columns (e.g. 'Time of Day'). No time-based datasets were found automatically.")
-    else:
-        # display each discovered dataset using a pretty title (no raw filename printed)
-        for key, df in time_related:
-            pretty = pretty_title_from_key(key)
-            st.subheader(f"{pretty} — by Time of Day")
-            # pick an explicit id_col using common variants
-            id_col = None
-            for candidate in df.columns:
-                low = candidate.lower()
-                if "time of day" in low or "time of" in low or "time" == low or low.startswith("time ") or "time" in low or "hour" in low:
-                    id_col = candidate
-                    break
-            if id_col is None:
-                # fallback to first column
-                id_col = df.columns[0] if len(df.columns) > 0 else None
-            if id_col:
-                stacked_bar_from_df(df, id_col, f"{pretty} — by {id_col}")
+    _page_crimes_by_time()
 
 elif selected_group == "Weapons & Circumstances":
     st.subheader("🛡 Weapons & Circumstances")
-    plot_other_analysis()
+    _plot_group(selected_group)
 
 elif selected_group == "Drugs & Alcohol":
     st.subheader("💊 Drug & Alcohol")
-    # find any loaded datasets whose friendly key mentions drug or alcohol
-    found = False
-    for key, df in loaded_data.items():
-        if df is None or df.empty:
-            continue
-        if "drug" in key.lower() or "alcohol" in key.lower():
-            found = True
-            st.subheader(pretty_title_from_key(key))
-            # try to pick sensible id column (first textual column)
-            id_col = next((c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])), df.columns[0] if len(df.columns)>0 else None)
-            if id_col:
-                stacked_bar_from_df(df, id_col, pretty_title_from_key(key))
-    # additionally scan CSV filenames (in case some drug files were not in the mapping)
-    for fname in csv_files:
-        if "drug" in fname.lower() or "alcohol" in fname.lower():
-            df_try = load_csv(fname)
-            if df_try is None or df_try.empty:
-                continue
-            # avoid duplicates if we already displayed the mapped one
-            already = any(pretty_title_from_key(k).lower() == pretty_title_from_key(fname).lower() for k,_ in loaded_data.items())
-            if already:
-                continue
-            found = True
-            st.subheader(pretty_title_from_key(fname))
-            id_col = next((c for c in df_try.columns if not pd.api.types.is_numeric_dtype(df_try[c])), df_try.columns[0] if len(df_try.columns)>0 else None)
-            if id_col:
-                stacked_bar_from_df(df_try, id_col, pretty_title_from_key(fname))
-    if not found:
-        st.warning("No drug/alcohol datasets detected in the mapped files. Make sure the drug/alcohol CSVs are next to app.py; their filenames often contain 'drug' or 'alcohol'.")
+    _page_drugs_alcohol()
 
 elif selected_group == "Agency-level":
     st.subheader("🏛 Agency-level (US Offense by Agency)")
-    possible = [f for f in os.listdir(".") if "united_states" in f.lower() or "offense_type_by_agency" in f.lower() or "us_offense" in f.lower()]
-    if possible:
-        preview = load_csv(possible[0])
-        st.write("File:", possible[0])
-        # use the helper for filtered, paginated display (keeps Streamlit table style)
-        agency_table_with_filters(preview)
-    else:
-        st.info("Place the US_Offense_Agency CSV next to app.py with name containing 'united_states' or 'us_offense'.")
+    _page_agency_level()
 
 st.markdown("---")
 st.caption("If a plot warns that numeric columns are missing, check your CSVs in the project folder. If you'd like additional filters (state/time/age/sex), tell me and I'll add them.")